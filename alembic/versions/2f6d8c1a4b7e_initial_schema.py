@@ -0,0 +1,63 @@
+"""initial schema
+
+Схема до переходу на міграції (моделі, які створював create_all);
+існуючу базу позначають цією ревізією: alembic stamp 2f6d8c1a4b7e
+
+Revision ID: 2f6d8c1a4b7e
+Revises: 
+Create Date: 2026-10-18 19:05:12.318254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6d8c1a4b7e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('iat', sa.DateTime(), nullable=True),
+        sa.Column('avatar', sa.String(length=255), nullable=True),
+        sa.Column('refresh_token', sa.String(length=255), nullable=True),
+        sa.Column('confirmed', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_table(
+        'contacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('lastname', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('birthday', sa.Date(), nullable=True),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('additional', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_contacts_id', 'contacts', ['id'])
+    op.create_index('ix_contacts_name', 'contacts', ['name'])
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
+    op.create_index('ix_contacts_description', 'contacts', ['description'])
+
+
+def downgrade() -> None:
+    op.drop_table('contacts')
+    op.drop_table('users')
@@ -0,0 +1,29 @@
+"""contacts keyset pagination indexes
+
+Revision ID: 4a1c7e93d2b5
+Revises: 2f6d8c1a4b7e
+Create Date: 2026-10-18 19:05:12.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a1c7e93d2b5'
+down_revision: Union[str, None] = '2f6d8c1a4b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # сторінки списку контактів - range scan по (user_id, id) / (user_id, name, id)
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'])
+    op.create_index('ix_contacts_user_id_name_id', 'contacts', ['user_id', 'name', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_name_id', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
@@ -0,0 +1,68 @@
+"""contacts search indexes
+
+Revision ID: 5c8e2f61a7d3
+Revises: 4a1c7e93d2b5
+Create Date: 2026-10-18 19:05:13.377092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2f61a7d3'
+down_revision: Union[str, None] = '4a1c7e93d2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_COLUMNS = ("name", "lastname", "email", "phone", "description")
+# coalesce(name, '') || ' ' || ... - той самий вираз, що будує contact_search_document()
+SEARCH_DOCUMENT = " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+
+SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        {", ".join(SEARCH_COLUMNS)}, content='contacts', content_rowid='id', tokenize='unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+        INSERT INTO contacts_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+    # контакти, які вже є в таблиці
+    "INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX ix_contacts_search_tsv ON contacts "
+                   f"USING gin (to_tsvector('simple'::regconfig, {SEARCH_DOCUMENT}))")
+        op.execute(f"CREATE INDEX ix_contacts_search_trgm ON contacts "
+                   f"USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)")
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_contacts_search_trgm', table_name='contacts')
+        op.drop_index('ix_contacts_search_tsv', table_name='contacts')
+    elif dialect == 'sqlite':
+        for trigger in ("contacts_fts_ai", "contacts_fts_ad", "contacts_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS contacts_fts")
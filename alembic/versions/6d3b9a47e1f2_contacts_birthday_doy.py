@@ -0,0 +1,44 @@
+"""contacts birthday_doy
+
+Revision ID: 6d3b9a47e1f2
+Revises: 5c8e2f61a7d3
+Create Date: 2026-10-18 19:05:13.721560
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d3b9a47e1f2'
+down_revision: Union[str, None] = '5c8e2f61a7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# день року дня народження у високосному (2000) календарі, 1..366 - те саме правило,
+# що й models.birthday_doy(); для контактів, які вже є в базі
+BACKFILL = {
+    'postgresql': (
+        "UPDATE contacts SET birthday_doy = EXTRACT(DOY FROM make_date(2000, "
+        "EXTRACT(MONTH FROM birthday)::int, EXTRACT(DAY FROM birthday)::int))::int "
+        "WHERE birthday IS NOT NULL"
+    ),
+    'sqlite': (
+        "UPDATE contacts SET birthday_doy = CAST(strftime('%j', '2000-' || strftime('%m-%d', birthday)) AS INTEGER) "
+        "WHERE birthday IS NOT NULL"
+    ),
+}
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_doy', sa.Integer(), nullable=True))
+    op.execute(BACKFILL[op.get_bind().dialect.name])
+    op.create_index('ix_contacts_user_id_birthday_doy', 'contacts', ['user_id', 'birthday_doy'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_doy', table_name='contacts')
+    op.drop_column('contacts', 'birthday_doy')
@@ -0,0 +1,33 @@
+"""contacts index plan
+
+Revision ID: 9b3e5a7c2d10
+Revises: 6d3b9a47e1f2
+Create Date: 2026-10-18 19:05:14.052117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5a7c2d10'
+down_revision: Union[str, None] = '6d3b9a47e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # усі запити репозиторію фільтрують по user_id - він іде першим у складених індексах;
+    # (user_id, id) вже є (ix_contacts_user_id_id, ревізія 4a1c7e93d2b5)
+    op.create_index('ix_contacts_user_id_email', 'contacts', ['user_id', 'email'])
+    op.create_index('ix_contacts_user_id_lastname_name', 'contacts', ['user_id', 'lastname', 'name'])
+    # description шукається повнотекстовим індексом; btree по ньому лише сповільнює запис
+    op.drop_index('ix_contacts_description', table_name='contacts')
+
+
+def downgrade() -> None:
+    op.create_index('ix_contacts_description', 'contacts', ['description'])
+    op.drop_index('ix_contacts_user_id_lastname_name', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_email', table_name='contacts')
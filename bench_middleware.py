@@ -0,0 +1,140 @@
+# bench_middleware.py
+# Бенчмарк накладних витрат middleware: requests/sec на GET / і GET /api/contacts/
+# з попереднім таймінг-middleware на @app.middleware("http") (BaseHTTPMiddleware)
+# і з чистим ASGI ServerTimingMiddleware. Запити йдуть у застосунок напряму
+# через httpx.ASGITransport, без мережі, тож різниця - це сам стек middleware.
+# Користувач і контакти створюються в базі SQLALCHEMY_DATABASE_URL і видаляються після.
+#
+#   python bench_middleware.py --requests 2000 --concurrency 20 --rounds 3
+#
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import delete, insert, select
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from main import app
+from src.database.conn_db import SessionLocal, engine
+from src.database.models import Contact, User
+from src.services.auth import auth_service
+from src.services.metrics import RequestTiming, ServerTimingMiddleware, current_timing, metrics
+from src.services.rate_limit import limiter
+
+
+BENCH_DOMAIN = "middleware.bench"
+BENCH_EMAIL = f"user@{BENCH_DOMAIN}"
+
+
+async def legacy_timing(request, call_next):
+    # таймінг-middleware у тому вигляді, в якому він був до переходу на ASGI
+    timing = RequestTiming()
+    token = current_timing.set(timing)
+    try:
+        response = await call_next(request)
+    finally:
+        current_timing.reset(token)
+    total_ns = time.perf_counter_ns() - timing.started
+    response.headers["Server-Timing"] = timing.server_timing(total_ns)
+    route = request.scope.get("route")
+    metrics.observe(request.method, route.path if route else "unmatched", response.status_code,
+                    total_ns / 1e9, timing)
+    return response
+
+
+ASGI_STACK = list(app.user_middleware)
+LEGACY_STACK = [
+    Middleware(BaseHTTPMiddleware, dispatch=legacy_timing) if m.cls is ServerTimingMiddleware else m
+    for m in ASGI_STACK
+]
+
+
+def use_stack(stack: list) -> None:
+    app.user_middleware = list(stack)
+    # Starlette збирає стек при першому запиті
+    app.middleware_stack = None
+
+
+async def seed(contacts: int) -> str:
+    async with SessionLocal() as db:
+        await cleanup(db)
+        user = User(username="bench", email=BENCH_EMAIL, password="x", confirmed=True)
+        db.add(user)
+        await db.flush()
+        if contacts:
+            await db.execute(insert(Contact), [
+                {"name": f"Name{i}", "lastname": "Bench", "email": f"{i}@{BENCH_DOMAIN}", "phone": "380000000000",
+                 "description": "bench", "user_id": user.id}
+                for i in range(contacts)
+            ])
+        await db.commit()
+    return await auth_service.create_access_token(data={"sub": BENCH_EMAIL})
+
+
+async def cleanup(db) -> None:
+    user_ids = (await db.execute(select(User.id).where(User.email == BENCH_EMAIL))).scalars().all()
+    if user_ids:
+        await db.execute(delete(Contact).where(Contact.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    counter = iter(range(requests))
+
+    async def worker():
+        for _ in counter:
+            response = await client.get(path)
+            assert response.status_code == 200, (path, response.status_code, response.text)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return requests / (time.perf_counter() - started)
+
+
+async def bench(requests: int, concurrency: int, rounds: int, contacts: int) -> None:
+    # ліміти запитів тут лише заважали б вимірюванню
+    for limit in limiter.limits.values():
+        limit.times = 10 ** 9
+    token = await seed(contacts)
+    paths = ["/", f"/api/contacts/?limit={contacts or 1}"]
+    stacks = {"@app.middleware": LEGACY_STACK, "pure ASGI": ASGI_STACK}
+    best = {(name, path): 0.0 for name in stacks for path in paths}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     headers={"Authorization": f"Bearer {token}"}) as client:
+            # по черзі, кілька раундів - щоб шум машини не впав на один варіант
+            for _ in range(rounds):
+                for name, stack in stacks.items():
+                    use_stack(stack)
+                    for path in paths:
+                        await measure(client, path, max(1, requests // 10), concurrency)
+                        rps = await measure(client, path, requests, concurrency)
+                        best[(name, path)] = max(best[(name, path)], rps)
+    finally:
+        use_stack(ASGI_STACK)
+        async with SessionLocal() as db:
+            await cleanup(db)
+        await engine.dispose()
+
+    print(f"{'endpoint':<28} {'@app.middleware':>16} {'pure ASGI':>12} {'change':>8}")
+    for path in paths:
+        before, after = best[("@app.middleware", path)], best[("pure ASGI", path)]
+        print(f"GET {path:<24} {before:>12.0f} r/s {after:>8.0f} r/s {(after / before - 1) * 100:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Middleware overhead: BaseHTTPMiddleware vs pure ASGI")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint per round")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="best of N alternating rounds")
+    parser.add_argument("--contacts", type=int, default=20, help="contacts returned by /api/contacts/")
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency, args.rounds, args.contacts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench_password.py
+# Бенчмарк bcrypt для логіну: скільки перевірок пароля за секунду дає одне ядро,
+# скільки - пул потоків Auth, і наскільки блокується event loop,
+# коли verify викликається прямо в async-обробнику і коли через пул.
+#
+#   python bench_password.py --rounds 10 12 --logins 32 --workers 4
+#
+import argparse
+import asyncio
+import os
+import time
+
+from src.services.auth import Auth
+
+
+def make_auth(rounds: int, workers: int) -> Auth:
+    return Auth(schemes=["bcrypt"], deprecated="auto", secret_key="bench", algorithm="HS256",
+                bcrypt_rounds=rounds, hash_workers=workers)
+
+
+async def ticker(lags: list, interval: float = 0.01):
+    # наскільки пізніше запланованого прокидається корутина - затримка для інших запитів
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run_logins(auth: Auth, hashed: str, logins: int, in_pool: bool) -> dict:
+    lags = []
+    tick = asyncio.create_task(ticker(lags))
+    await asyncio.sleep(0.05)
+
+    async def login():
+        if in_pool:
+            valid, _ = await auth.verify_and_update_password("password", hashed)
+        else:
+            valid = auth.verify_password("password", hashed)
+        assert valid
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    seconds = time.perf_counter() - started
+    # даємо ticker-у прокинутись і записати затримку, яку спричинив останній виклик
+    await asyncio.sleep(0.05)
+    tick.cancel()
+    return {
+        "logins_per_second": logins / seconds,
+        "max_loop_lag_ms": max(lags, default=0) * 1000,
+    }
+
+
+async def bench(rounds: int, logins: int, workers: int) -> None:
+    auth = make_auth(rounds, workers)
+    hashed = auth.get_password_hash("password")
+
+    started = time.perf_counter()
+    for _ in range(max(1, logins // 4)):
+        auth.verify_password("password", hashed)
+    per_core = max(1, logins // 4) / (time.perf_counter() - started)
+
+    inline = await run_logins(auth, hashed, logins, in_pool=False)
+    pooled = await run_logins(auth, hashed, logins, in_pool=True)
+    auth.hash_executor.shutdown()
+
+    cores = min(workers, os.cpu_count() or 1)
+    print(f"rounds={rounds:<3} one core: {per_core:7.1f} logins/s")
+    print(f"  inline in async handler: {inline['logins_per_second']:7.1f} logins/s, "
+          f"event loop blocked up to {inline['max_loop_lag_ms']:8.1f} ms")
+    print(f"  bcrypt pool ({workers} threads): {pooled['logins_per_second']:7.1f} logins/s "
+          f"({pooled['logins_per_second'] / cores:.1f} per core), "
+          f"event loop blocked up to {pooled['max_loop_lag_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bcrypt login throughput and event loop latency")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--logins", type=int, default=32, help="concurrent logins per run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, pool threads: {args.workers}")
+    for rounds in args.rounds:
+        asyncio.run(bench(rounds, args.logins, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench_rows.py
+# Бенчмарк режиму read_only у src/repository/contacts.py: читання N контактів
+# ORM-об'єктами (identity map, відстеження змін) і Core-рядками.
+# Для кожного режиму - найкращий час запиту, запит + серіалізація (dump_contacts),
+# пік пам'яті (tracemalloc) і кількість блоків пам'яті, які тримає результат.
+# База - sqlite у пам'яті, тож різниця - це робота ORM, а не мережа.
+#
+#   python bench_rows.py --rows 10000 --rounds 7
+#
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, Contact, User
+from src.repository import contacts as repository_contacts
+from src.services.contacts_cache import dump_contacts
+
+
+async def seed(session_maker, rows: int) -> User:
+    async with session_maker() as db:
+        user = User(id=1, username="bench", email="user@rows.bench", password="x", confirmed=True)
+        db.add(user)
+        await db.flush()
+        await db.execute(insert(Contact), [
+            {"name": f"Name{i}", "lastname": "Bench", "email": f"{i}@rows.bench", "phone": "380000000000",
+             "description": "bench contact with a longer description", "user_id": user.id}
+            for i in range(rows)
+        ])
+        await db.commit()
+        return user
+
+
+async def read(session_maker, user: User, rows: int, read_only: bool, serialize: bool):
+    # нова сесія на кожне читання - як сесія запиту
+    async with session_maker() as db:
+        contacts, _ = await repository_contacts.get_contacts_page(user, db, rows, read_only=read_only)
+        return dump_contacts(contacts) if serialize else contacts
+
+
+async def best_time(session_maker, user: User, rows: int, read_only: bool, serialize: bool, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        started = time.perf_counter()
+        await read(session_maker, user, rows, read_only, serialize)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def memory(session_maker, user: User, rows: int, read_only: bool) -> tuple:
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = await read(session_maker, user, rows, read_only, serialize=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+    del result
+    return peak, retained
+
+
+async def bench(rows: int, rounds: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        user = await seed(session_maker, rows)
+        modes = {"ORM": False, "read_only": True}
+        results = {}
+        for name, read_only in modes.items():
+            await read(session_maker, user, rows, read_only, serialize=True)   # прогрів
+            results[name] = (
+                await best_time(session_maker, user, rows, read_only, False, rounds),
+                await best_time(session_maker, user, rows, read_only, True, rounds),
+                *await memory(session_maker, user, rows, read_only),
+            )
+    finally:
+        await engine.dispose()
+
+    print(f"{rows} rows, best of {rounds}")
+    print(f"{'mode':<10} {'query':>10} {'+serialize':>12} {'peak memory':>12} {'live blocks':>12}")
+    for name, (query, total, peak, retained) in results.items():
+        print(f"{name:<10} {query * 1000:>7.1f} ms {total * 1000:>9.1f} ms {peak / 2 ** 20:>9.1f} MB {retained:>12}")
+    (orm_query, orm_total, orm_peak, orm_blocks), (ro_query, ro_total, ro_peak, ro_blocks) = results.values()
+    print(f"{'change':<10} {(ro_query / orm_query - 1) * 100:>+8.1f}% {(ro_total / orm_total - 1) * 100:>+10.1f}%"
+          f" {(ro_peak / orm_peak - 1) * 100:>+10.1f}% {(ro_blocks / orm_blocks - 1) * 100:>+11.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contact reads: ORM instances vs read_only Core rows")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=7, help="best of N")
+    args = parser.parse_args()
+    asyncio.run(bench(args.rows, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
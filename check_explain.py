@@ -0,0 +1,172 @@
+# check_explain.py
+# Перевірка плану запитів: наповнює базу (SQLALCHEMY_DATABASE_URL) великим набором контактів,
+# виконує запити репозиторію і для кожного SELECT/UPDATE/DELETE робить EXPLAIN.
+# Якщо хоч один запит читає contacts/users повним скануванням - код виходу 1.
+#
+#   python check_explain.py --users 1000 --contacts 100
+#
+import argparse
+import asyncio
+import random
+import re
+import sys
+from datetime import date, timedelta
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import delete, event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.conn_db import engine
+from src.database.models import Contact, User, birthday_doy
+from src.repository import contacts as repository_contacts
+from src.repository import users as repository_users
+from src.schemas import ContactBulkValues, ContactFilter
+
+
+SEED_DOMAIN = "explain.check"
+NAMES = ["Olena", "Oleh", "Petro", "Iryna", "Taras", "Mariia", "Andrii", "Sofiia", "Bohdan", "Nadiia"]
+LASTNAMES = ["Kovalenko", "Shevchenko", "Bondarenko", "Tkachenko", "Kravchenko", "Melnyk", "Olenko"]
+
+# повне сканування таблиці: Postgres - Seq Scan, SQLite - SCAN без індексу
+SEQ_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on (contacts|users)\b"),
+    "sqlite": re.compile(r"\bSCAN (contacts|users)\b(?! USING (COVERING )?INDEX)"),
+}
+EXPLAIN = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+
+def contact_rows(user_id: int, count: int, rnd: random.Random):
+    for i in range(count):
+        birthday = date(1950, 1, 1) + timedelta(days=rnd.randrange(365 * 50))
+        yield {
+            "name": rnd.choice(NAMES),
+            "lastname": rnd.choice(LASTNAMES),
+            "email": f"{user_id}-{i}@{SEED_DOMAIN}",
+            "phone": f"380{rnd.randrange(10 ** 9):09d}",
+            "birthday": birthday,
+            "birthday_doy": birthday_doy(birthday),
+            "age": date.today().year - birthday.year,
+            "description": rnd.choice(["friend", "colleague from Kyiv", "gym", "neighbour"]),
+            "additional": "None",
+            "user_id": user_id,
+        }
+
+
+async def seed(db: AsyncSession, users: int, contacts: int) -> list:
+    rnd = random.Random(14)
+    result = await db.execute(insert(User).returning(User.id), [
+        {"username": f"explain{i}", "email": f"user{i}@{SEED_DOMAIN}", "password": "x", "confirmed": True}
+        for i in range(users)
+    ])
+    user_ids = list(result.scalars().all())
+    for user_id in user_ids:
+        await db.execute(insert(Contact), list(contact_rows(user_id, contacts, rnd)))
+    await db.commit()
+    # свіжа статистика, інакше планувальник не знає розміру таблиць
+    await db.execute(text("ANALYZE"))
+    await db.commit()
+    return user_ids
+
+
+async def cleanup(db: AsyncSession, user_ids: list) -> None:
+    await db.execute(delete(Contact).where(Contact.user_id.in_(user_ids)))
+    await db.execute(delete(User).where(User.id.in_(user_ids)))
+    await db.commit()
+
+
+def repository_queries(user: User):
+    today = date.today()
+    return {
+        "get_contacts": lambda db: repository_contacts.get_contacts(0, 100, user, db),
+        "get_contacts_page(id)": lambda db: repository_contacts.get_contacts_page(user, db, 100, "id", (500,)),
+        "get_contacts_page(name)": lambda db: repository_contacts.get_contacts_page(user, db, 100, "name", ("Oleh", 10)),
+        "get_contact": lambda db: repository_contacts.get_contact(1, user, db),
+        "search_contacts(name)": lambda db: repository_contacts.search_contacts(user, db, name="Ol"),
+        "search_contacts(lastname)": lambda db: repository_contacts.search_contacts(user, db, lastname="Shev"),
+        "search_contacts(email)": lambda db: repository_contacts.search_contacts(user, db, email=f"{user.id}-1"),
+        "search_contacts(search_key)": lambda db: repository_contacts.search_contacts(user, db, search_key="olena kyiv"),
+        "get_week_birthdays": lambda db: repository_contacts.get_week_birthdays(user, db),
+        "get_upcoming_birthdays": lambda db: repository_contacts.get_upcoming_birthdays(user, db, today, 30),
+        "stream_contacts": lambda db: stream_first(repository_contacts.stream_contacts(user, db)),
+        "bulk_update_contacts": lambda db: repository_contacts.bulk_update_contacts(
+            ContactBulkValues(description="checked"), user, db, criteria=ContactFilter(name="Nobody")),
+        "bulk_remove_contacts": lambda db: repository_contacts.bulk_remove_contacts(user, db, ids=[0]),
+        "get_user_by_email": lambda db: repository_users.get_user_by_email(user.email, db),
+    }
+
+
+async def stream_first(batches):
+    async for rows in batches:
+        return rows
+
+
+async def check(users: int, contacts: int) -> bool:
+    dialect = engine.dialect.name
+    if dialect not in EXPLAIN:
+        print(f"EXPLAIN check supports postgresql and sqlite, not {dialect}")
+        return False
+
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+        explain_cursor = conn.connection.cursor()
+        explain_cursor.execute(EXPLAIN[dialect] + statement, parameters)
+        rows = explain_cursor.fetchall()
+        explain_cursor.close()
+        plans.append([" | ".join(str(value) for value in row) for row in rows])
+
+    async with session() as db:
+        print(f"Seeding {users} users x {contacts} contacts ({dialect})...")
+        user_ids = await seed(db, users, contacts)
+    ok = True
+    try:
+        async with session() as db:
+            user = await db.get(User, user_ids[len(user_ids) // 2])
+        for label, query in repository_queries(user).items():
+            plans.clear()
+            event.listen(engine.sync_engine, "before_cursor_execute", explain)
+            try:
+                async with session() as db:
+                    await query(db)
+            except Exception as err:
+                print(f"ERROR     {label}: {err}")
+                ok = False
+                continue
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", explain)
+
+            seq_scans = [line for plan in plans for line in plan if SEQ_SCAN[dialect].search(line)]
+            print(f"{'SEQ SCAN' if seq_scans else 'OK':<9} {label}")
+            if seq_scans:
+                ok = False
+                for plan in plans:
+                    print("\n".join("          " + line for line in plan))
+    finally:
+        async with session() as db:
+            await cleanup(db, user_ids)
+        await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every repository query on a seeded large dataset")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--contacts", type=int, default=100, help="contacts per user")
+    parser.add_argument("--no-migrate", action="store_true", help="do not run alembic upgrade head first")
+    args = parser.parse_args()
+
+    if not args.no_migrate:
+        command.upgrade(Config("alembic.ini"), "head")
+    ok = asyncio.run(check(args.users, args.contacts))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, Request, Depends
-import time
+from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 import redis.asyncio as redis
 import uvicorn
 
@@ -9,18 +9,31 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from fastapi_limiter import FastAPILimiter #connect
-from fastapi_limiter.depends import RateLimiter #speed limit
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.routes import contacts, auth, users
+from src.routes import contacts, auth, users, internal
+from src.database.conn_db import engine, replicas
+from src.database.pool import warmup_pool
+from src.config import settings
+from src.services.pagination import NEXT_CURSOR_HEADER
+from src.services.cache import contact_cache, user_cache
+from src.services.refresh_tokens import refresh_tokens
+from src.services.revocation import revocation_list
+from src.services.rate_limit import limiter
+from src.services.invalidation import invalidation_bus
+from src.services.metrics import ServerTimingMiddleware, TimedJSONResponse, instrument_engine, metrics
 # from src.routes.contacts import contacts
 
 from dotenv import load_dotenv
 load_dotenv()
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=TimedJSONResponse)
+
+# кожен SQL-запит потрапляє у фазу db поточного запиту
+instrument_engine(engine)
+for replica in replicas.replicas:
+    instrument_engine(replica.engine)
 
 @app.on_event("startup")
 async def startup():
@@ -36,40 +49,54 @@ async def startup():
                           port=os.environ['REDIS_PORT'], 
                           db=0, 
                           encoding="utf-8", decode_responses=True)
-    await FastAPILimiter.init(r)
+    contact_cache.init(r)
+    user_cache.init(r)
+    refresh_tokens.init(r)
+    invalidation_bus.start(r)
+    await revocation_list.start(r)
+    limiter.start(r)
+    await warmup_pool(engine, settings.db_pool_warmup)
+    for replica in replicas.replicas:
+        await warmup_pool(replica.engine, settings.db_pool_warmup)
+    replicas.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    The shutdown function closes the pooled database connections when the application stops.
 
+    :return: None
+    """
+    await limiter.stop()
+    await revocation_list.stop()
+    await invalidation_bus.stop()
+    await replicas.stop()
+    await engine.dispose()
 
 
 
-# Cross-Origin Resource Sharing 
-@app.middleware("http") 
-async def add_process_time_header(request: Request, call_next):
-    """
-    The add_process_time_header function adds a header to the response called My-Process-Time.
-    The value of this header is the time it took for the request to be processed by all middleware and routes.
-    
-    :param request: Request: Access the request object
-    :param call_next: Pass the request to the next function in the pipeline
-    :return: A response object
-    :doc-author: Trelent
-    """
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["My-Process-Time"] = str(process_time)
-    return response
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(internal.require_internal_token)])
+async def read_metrics():
+    # текстовий формат Prometheus, лічильники цього воркера; доступ - з INTERNAL_TOKEN
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 origins = [ 
     "http://localhost:3000",
     "'127.0.0.1:6379"
     ]
 
+# Cross-Origin Resource Sharing 
+# обидва шари - чисті ASGI-middleware; останній доданий - зовнішній (CORS, потім Server-Timing)
+app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
 
@@ -77,11 +104,13 @@ app.add_middleware(
 # app.include_router(auth.router, prefix='/api')
 # app.include_router(contacts.router, prefix='/api') 
 
+# ліміти рахуються в пам'яті воркера і звіряються з Redis у фоні (src/services/rate_limit.py)
 app.include_router(auth.router, prefix='/api', 
-                   dependencies=[Depends(RateLimiter(times=2, seconds=5))])
+                   dependencies=[Depends(limiter.limit("auth", times=2, seconds=5))])
 app.include_router(contacts.router, prefix='/api', 
-                   dependencies=[Depends(RateLimiter(times=2, seconds=5))])
+                   dependencies=[Depends(limiter.limit("contacts", times=2, seconds=5))])
 app.include_router(users.router, prefix='/api')
+app.include_router(internal.router, prefix='/api')
 
 
 
@@ -0,0 +1,41 @@
+# rotate_jwt_keys.py
+# Ротація ключів підпису JWT (JWT_KEYS_DIR): додає новий ключ і видаляє найстаріші понад --max-keys.
+# Новий ключ одразу з'являється в /api/auth/jwks.json, а підписувати починає
+# через JWT_KEY_ACTIVATE_AFTER секунд; воркери підхоплюють зміни самі.
+#
+#   python rotate_jwt_keys.py --algorithm RS256 --max-keys 3
+#   python rotate_jwt_keys.py --list
+#
+import argparse
+import sys
+from datetime import datetime
+
+from src.config import settings
+from src.services.keyring import KEY_ALGORITHMS, KeyRing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rotate or list the JWT signing keys")
+    parser.add_argument("--dir", default=settings.jwt_keys_dir, help="key directory (JWT_KEYS_DIR)")
+    parser.add_argument("--algorithm", choices=KEY_ALGORITHMS, default=settings.jwt_key_algorithm)
+    parser.add_argument("--max-keys", type=int, default=settings.jwt_max_keys)
+    parser.add_argument("--list", action="store_true", help="only show the keys in the ring")
+    args = parser.parse_args()
+
+    if not args.dir:
+        print("JWT_KEYS_DIR is not set, pass --dir")
+        sys.exit(1)
+    ring = KeyRing(keys_dir=args.dir, algorithm=args.algorithm, max_keys=args.max_keys,
+                   activate_after=settings.jwt_key_activate_after)
+    if not args.list:
+        key = ring.rotate()
+        print(f"New key {key.kid} ({key.algorithm})")
+    ring.load()
+    active = ring.active
+    for key in ring.ordered():
+        mark = "*" if key is active else " "
+        print(f"{mark} {key.kid}  {key.algorithm}  {datetime.fromtimestamp(key.created):%Y-%m-%d %H:%M:%S}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 from src.config import settings
+from src.database.pool import TimedQueuePool
+from src.database.replicas import ReplicaSet, RoutingSession
 import logging
 
 
@@ -14,17 +16,69 @@ SQLALCHEMY_DATABASE_URL = URI
 assert SQLALCHEMY_DATABASE_URL is not None, "SQLALCHEMY_DATABASE_URL UNDEFINED"
 logging.info(f"Connecting to database with URI: {SQLALCHEMY_DATABASE_URL}")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) #загальне по документації
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    except SQLAlchemyError as err:
-        print("SQLAlchemyError:", err)
-        logging.error(f"SQLAlchemyError: {err}")
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
-    finally:
-        db.close()
\ No newline at end of file
+# драйвери, які не блокують event loop
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    The to_async_url function swaps a sync driver in the database URL
+    (postgresql+psycopg2, sqlite) for its async counterpart (asyncpg, aiosqlite).
+
+    :param url: str: Database URL from the settings
+    :return: The same URL with an async driver
+    """
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend in ASYNC_DRIVERS and url_obj.drivername != ASYNC_DRIVERS[backend]:
+        url_obj = url_obj.set(drivername=ASYNC_DRIVERS[backend])
+    return url_obj.render_as_string(hide_password=False)
+
+
+def make_engine(url: str):
+    return create_async_engine(
+        to_async_url(url),
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_timeout=settings.db_pool_timeout,
+    )
+
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+
+# read-репліки (DB_REPLICA_URLS через кому); без них усе йде на primary
+REPLICA_URLS = [url.strip() for url in settings.db_replica_urls.split(",") if url.strip()]
+replicas = ReplicaSet(
+    [make_engine(url) for url in REPLICA_URLS],
+    max_lag=settings.db_replica_max_lag,
+    check_interval=settings.db_replica_check_interval,
+)
+
+# expire_on_commit=False - після commit атрибути не перечитуються ліниво (в async це помилка)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+                                  sync_session_class=RoutingSession, replicas=replicas)
+
+
+async def get_db():
+    """
+    The get_db function is a FastAPI dependency that yields an AsyncSession
+    and closes it when the request is done.
+
+    :return: An AsyncSession bound to the async engine
+    """
+    async with SessionLocal() as db:
+        try:
+            yield db
+        except SQLAlchemyError as err:
+            print("SQLAlchemyError:", err)
+            logging.error(f"SQLAlchemyError: {err}")
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
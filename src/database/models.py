@@ -7,9 +7,13 @@ from sqlalchemy import (
     DateTime, 
     func, 
     event, 
-    Date
+    Date,
+    Index,
+    DDL,
+    literal_column
     )
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.orm import relationship, declarative_base, validates
+from datetime import date
 
 # from src.schemas import UserResponse, UserDb
 
@@ -25,15 +29,103 @@ class Contact(Base):
     email = Column(String, unique=True, index=True)
     phone = Column(String, default="None", nullable=False)
     birthday = Column(Date, default=None, nullable=True)
+    # день року дня народження у високосному календарі (1..366), рахується з birthday
+    birthday_doy = Column(Integer, nullable=True)
     
     # optional data
     age = Column(Integer)
     additional = Column(String, default="None", nullable=False)
-    description = Column(String, default="None", index=True)
+    description = Column(String, default="None")
     user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
     user = relationship("User", backref="contacts")
     created_at = Column(DateTime, default=func.now())  
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # індекси під запити репозиторію (усі фільтрують по user_id); зміни - через міграції alembic
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_name_id", "user_id", "name", "id"),
+        Index("ix_contacts_user_id_birthday_doy", "user_id", "birthday_doy"),
+        Index("ix_contacts_user_id_email", "user_id", "email"),
+        Index("ix_contacts_user_id_lastname_name", "user_id", "lastname", "name"),
+    )
+
+    @validates("birthday")
+    def validate_birthday(self, key, value):
+        self.birthday_doy = birthday_doy(value)
+        return value
+
+
+def birthday_doy(value: date | None) -> int | None:
+    """
+    The birthday_doy function returns the day of year of a date in a leap year,
+    so every month/day (including 29 February) has one fixed number 1..366.
+
+    :param value: date | None: Birthday
+    :return: Day of year or None
+    """
+    if value is None:
+        return None
+    return date(2000, value.month, value.day).timetuple().tm_yday
+
+
+# --- повнотекстовий пошук по контактах ---
+SEARCH_COLUMNS = ("name", "lastname", "email", "phone", "description")
+
+
+def contact_search_document():
+    """
+    The contact_search_document function joins the searchable columns into one text expression.
+    Literals are rendered inline, so the expression in queries matches the index expression.
+
+    :return: SQL expression coalesce(name, '') || ' ' || ... || coalesce(description, '')
+    """
+    space = literal_column("' '")
+    empty = literal_column("''")
+    document = func.coalesce(getattr(Contact, SEARCH_COLUMNS[0]), empty)
+    for column in SEARCH_COLUMNS[1:]:
+        document = document.op("||")(space).op("||")(func.coalesce(getattr(Contact, column), empty))
+    return document
+
+
+def contact_search_vector():
+    return func.to_tsvector(literal_column("'simple'::regconfig"), contact_search_document())
+
+
+# Postgres: GIN по tsvector (слова і префікси) та pg_trgm (помилки в написанні, підрядки)
+event.listen(Contact.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+# (_table - бо перший аргумент to_tsvector не колонка і таблиця не визначається сама)
+Index("ix_contacts_search_tsv", contact_search_vector(),
+      postgresql_using="gin", _table=Contact.__table__).ddl_if(dialect="postgresql")
+Index("ix_contacts_search_trgm", contact_search_document().label("search_document"),
+      postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"},
+      _table=Contact.__table__).ddl_if(dialect="postgresql")
+
+# SQLite: зовнішня FTS5 таблиця, яку синхронізують тригери
+SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        {", ".join(SEARCH_COLUMNS)}, content='contacts', content_rowid='id', tokenize='unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+        INSERT INTO contacts_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+]
+for statement in SQLITE_FTS_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Contact.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
+
     
 class User(Base):
     __tablename__ = "users"
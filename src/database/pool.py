@@ -0,0 +1,127 @@
+# src\database\pool.py
+import asyncio
+import time
+import logging
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Лічильники checkout для пулу з'єднань (в межах одного воркера)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+
+    def observe(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_last = wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+    def as_dict(self) -> dict:
+        avg = self.wait_total / self.checkouts if self.checkouts else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "avg": round(avg * 1000, 3),
+                "max": round(self.wait_max * 1000, 3),
+                "last": round(self.wait_last * 1000, 3),
+            },
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, що вимірює час очікування з'єднання (checkout wait)
+    і рахує checkout timeouts.
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # пул перестворюється при dispose() - метрики зберігаємо
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe(time.perf_counter() - start)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """
+    The pool_status function returns the current state of the engine's connection pool:
+    size, checked-out / idle / overflow connections and checkout wait times.
+
+    :param engine: AsyncEngine: Engine whose pool is inspected
+    :return: A dict with the pool counters
+    """
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.as_dict())
+    return status
+
+
+async def warmup_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    The warmup_pool function opens several connections at once and returns them
+    to the pool, so the first requests don't pay the connect latency.
+
+    :param engine: AsyncEngine: Engine whose pool is warmed up
+    :param connections: int: How many connections to pre-open (capped by the pool size)
+    :return: The number of connections that were opened
+    """
+    pool = engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        connections = min(connections, pool.size())
+    if connections <= 0:
+        return 0
+
+    results = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)), return_exceptions=True
+    )
+    opened = 0
+    for conn in results:
+        if isinstance(conn, BaseException):
+            logger.warning(f"Pool warmup: connection failed: {conn}")
+            continue
+        opened += 1
+        await conn.close()
+    logger.info(f"Pool warmup: {opened}/{connections} connections ready")
+    return opened
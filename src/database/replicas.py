@@ -0,0 +1,179 @@
+# src\database\replicas.py
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+
+logger = logging.getLogger(__name__)
+
+# ключі в Session.info
+USE_PRIMARY = "use_primary"
+REPLICA = "replica"
+
+# скільки секунд репліка відстає від primary (0 - не репліка або все отримане вже застосовано:
+# без нових записів на primary now() - час останньої транзакції зростав би, хоча відставання немає)
+PG_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None     # time.monotonic() останнього виміру lag
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag": self.lag,
+        }
+
+
+class ReplicaSet:
+    """
+    Набір read-реплік: round-robin вибір серед здорових реплік
+    і фоновий моніторинг відставання (lag) від primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], max_lag: float, check_interval: float):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        """
+        The choose function returns the next healthy replica (round-robin),
+        or None if every replica lags too much, so the caller falls back to primary.
+
+        :return: A replica or None
+        """
+        total = len(self.replicas)
+        start = next(self._counter)
+        for i in range(total):
+            replica = self.replicas[(start + i) % total]
+            if replica.healthy:
+                return replica
+        return None
+
+    async def check(self) -> None:
+        """
+        The check function measures the replication lag of every replica
+        and marks the ones that are unreachable or lag more than max_lag as unhealthy.
+
+        :return: None
+        """
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    if replica.engine.dialect.name == "postgresql":
+                        lag = float(await conn.scalar(PG_LAG_QUERY))
+                    else:
+                        # у SQLite немає реплікації - лише перевіряємо доступність
+                        await conn.execute(text("SELECT 1"))
+                        lag = 0.0
+            except Exception as err:
+                if replica.healthy:
+                    logger.warning(f"Replica {replica.engine.url!r} is unavailable: {err}")
+                replica.healthy = False
+                replica.lag = None
+                continue
+            replica.lag = lag
+            replica.checked_at = time.monotonic()
+            replica.healthy = lag <= self.max_lag
+            if not replica.healthy:
+                logger.warning(f"Replica {replica.engine.url!r} lags {lag:.1f}s, using primary")
+
+    async def _monitor(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def as_list(self) -> List[dict]:
+        return [replica.as_dict() for replica in self.replicas]
+
+
+class RoutingSession(Session):
+    """
+    Session, що відправляє SELECT на репліку, а flush (INSERT/UPDATE/DELETE)
+    і всі запити після першого запису - на primary.
+    Репліка обирається один раз на сесію (один запит - одна репліка).
+    """
+
+    def __init__(self, replicas: Optional[ReplicaSet] = None, **kw):
+        super().__init__(**kw)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kw)
+        if not self.replicas or self.info.get(USE_PRIMARY):
+            return primary
+        if self._flushing or not isinstance(clause, Select):
+            # після запису читаємо з primary (read-your-writes)
+            self.info[USE_PRIMARY] = True
+            return primary
+
+        replica = self.info.get(REPLICA)
+        if replica is None or not replica.healthy:
+            replica = self.replicas.choose()
+            if replica is None:
+                return primary
+            self.info[REPLICA] = replica
+        return replica.engine.sync_engine
+
+
+def use_primary(db: AsyncSession) -> None:
+    """
+    The use_primary function pins the session to the primary database,
+    e.g. when rows are read in order to be modified.
+
+    :param db: AsyncSession: The session to pin
+    :return: None
+    """
+    db.info[USE_PRIMARY] = True
+
+
+def read_staleness(db: AsyncSession) -> Optional[float]:
+    """
+    The read_staleness function tells how far behind the primary the data read
+    in this session may be: 0 if every read went to the primary, otherwise
+    the last measured lag of the replica plus the time since it was measured
+    (the lag cannot grow faster than that).
+
+    :param db: AsyncSession: Session the data was read with
+    :return: Seconds, or None if the lag of the replica is unknown
+    """
+    replica = db.info.get(REPLICA)
+    if replica is None:
+        return 0.0
+    if replica.lag is None or replica.checked_at is None:
+        return None
+    return replica.lag + time.monotonic() - replica.checked_at
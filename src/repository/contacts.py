@@ -1,31 +1,119 @@
 # src\repository\contacts.py
-from typing import List, Optional
-
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, extract
-
-from src.database.models import Contact, User
-from src.schemas import ContactModel, ContactUpdate
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, case, delete, func, literal_column, select, text, tuple_, update, Row
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.database.models import Contact, User, birthday_doy
+from src.database.replicas import use_primary
+from src.repository.search import build_search, dialect_name
+from src.schemas import ContactBulkValues, ContactFilter, ContactModel, ContactUpdate, ContactUpsert
 from src.services.auth import Auth
+from src.services.invalidation import contacts_changed
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from fastapi import HTTPException, status
 
-async def get_contacts(skip: int, limit: int, user: User, db: Session) -> List[Contact]:
-    return db.query(Contact).filter(Contact.user_id == user.id).offset(skip).limit(limit).all()
+async def get_contacts(skip: int, limit: int, user: User, db: AsyncSession) -> List[Contact]:
+    stmt = select(Contact).filter(Contact.user_id == user.id).offset(skip).limit(limit)
+    contacts = await db.execute(stmt)
+    return list(contacts.scalars().all())
 
 
+# fields= : з БД читаються лише ці колонки (плюс потрібні для сортування);
+# звернення до не завантаженого атрибута - помилка, а не прихований запит
+def contact_columns(fields: Optional[Sequence[str]], *extra: str) -> list:
+    if fields is None:
+        return []
+    return [load_only(*[getattr(Contact, name) for name in {*fields, *extra}], raiseload=True)]
 
 
-async def search_contacts(
+# колонки, які читає режим read_only (поля ContactResponse)
+READ_COLUMNS = ("id", "name", "lastname", "email", "phone", "birthday", "description", "created_at", "updated_at")
+
+
+# read_only: Core-рядки (Row) замість ORM-об'єктів - без identity map, відстеження змін
+# і backref user; для маршрутів, які результат лише серіалізують
+def contact_select(read_only: bool, fields: Optional[Sequence[str]] = None, *extra: str) -> Select:
+    if not read_only:
+        return select(Contact).options(*contact_columns(fields, *extra))
+    names = READ_COLUMNS if fields is None else {*fields, *extra}
+    return select(*[getattr(Contact, name) for name in READ_COLUMNS if name in names])
+
+
+async def fetch_contacts(stmt: Select, db: AsyncSession, read_only: bool) -> List[Contact | Row]:
+    result = await db.execute(stmt)
+    return list(result.all() if read_only else result.scalars().all())
+
+
+def contact_sort_key(contact: Contact | Row, order: str) -> tuple:
+    if order == "name":
+        return (contact.name, contact.id)
+    return (contact.id,)
+
+
+# keyset-пагінація: замість offset фільтруємо по ключу останнього рядка,
+# тому будь-яка сторінка - це range scan по індексу (user_id, id) / (user_id, name, id)
+async def get_contacts_page(
+    user: User,
+    db: AsyncSession,
+    limit: int,
+    order: str = "id",
+    after: Optional[tuple] = None,
+    fields: Optional[Sequence[str]] = None,
+    read_only: bool = False,
+) -> Tuple[List[Contact | Row], Optional[tuple]]:
+    stmt = contact_select(read_only, fields, "id", "name").filter(Contact.user_id == user.id)
+
+    if order == "name" and after is not None and after[0] is not None:
+        # (name, id) > (:name, :id) - range condition по індексу (user_id, name, id);
+        # контакти без імені стоять у кінці списку - їх дочитує окремий запит,
+        # лише якщо сторінка не заповнилась (OR з IS NULL індекс не використав би)
+        named = stmt.filter(tuple_(Contact.name, Contact.id) > tuple_(*after)).order_by(Contact.name, Contact.id)
+        contacts = await fetch_contacts(named.limit(limit + 1), db, read_only)
+        if len(contacts) <= limit:
+            unnamed = stmt.filter(Contact.name.is_(None)).order_by(Contact.id)
+            contacts += await fetch_contacts(unnamed.limit(limit + 1 - len(contacts)), db, read_only)
+        return contacts_page(contacts, limit, order)
+
+    if order == "name":
+        if after is not None:
+            stmt = stmt.filter(Contact.name.is_(None), Contact.id > after[1])
+        stmt = stmt.order_by(Contact.name.asc().nulls_last(), Contact.id)
+    else:
+        if after is not None:
+            stmt = stmt.filter(Contact.id > after[0])
+        stmt = stmt.order_by(Contact.id)
+
+    # на один рядок більше - щоб знати, чи є наступна сторінка
+    contacts = await fetch_contacts(stmt.limit(limit + 1), db, read_only)
+    return contacts_page(contacts, limit, order)
+
+
+def contacts_page(contacts: list, limit: int, order: str) -> Tuple[list, Optional[tuple]]:
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        return contacts, contact_sort_key(contacts[-1], order)
+    return contacts, None
+
+
+# search_key - повнотекстовий пошук з ранжуванням (див. src/repository/search.py),
+# name/lastname/email - звуження за префіксом без урахування регістру;
+# спільний фільтр для пошуку і масових операцій
+def filter_contacts(
+    stmt: Select,
     user: User,
-    db: Session,
+    db: AsyncSession,
     search_key: Optional[str] = None,
     name: Optional[str] = None,
     lastname: Optional[str] = None,
-    email: Optional[str] = None
-) -> List[Contact]:
+    email: Optional[str] = None,
+) -> Select:
     filters = {
         "name": name,
         "lastname": lastname,
@@ -33,60 +121,276 @@ async def search_contacts(
     }
     filters = {k: v for k, v in filters.items() if v is not None}
 
-    contacts = db.query(Contact).filter(Contact.id == user.id).filter(
-        or_(
-            Contact.name == search_key,
-            Contact.lastname == search_key,
-            Contact.email == search_key,
-            **filters
-        )).all()
+    stmt = stmt.filter(Contact.user_id == user.id).filter(
+        *[getattr(Contact, k).istartswith(v, autoescape=True) for k, v in filters.items()]
+    )
+    if search_key:
+        stmt = build_search(db, stmt, search_key)
+    else:
+        stmt = stmt.order_by(Contact.id)
+
+    return stmt
+
 
-    if email:
-        contacts += db.query(Contact).filter(Contact.id == user.id).filter(Contact.email == email).all()
-    return contacts
+async def search_contacts(
+    user: User,
+    db: AsyncSession,
+    search_key: Optional[str] = None,
+    name: Optional[str] = None,
+    lastname: Optional[str] = None,
+    email: Optional[str] = None,
+    limit: int = 50,
+    fields: Optional[Sequence[str]] = None,
+    read_only: bool = False,
+) -> List[Contact | Row]:
+    stmt = filter_contacts(contact_select(read_only, fields, "id"), user, db, search_key, name, lastname, email)
+    return await fetch_contacts(stmt.limit(limit), db, read_only)
 
 
 
-async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
-    return db.query(Contact).filter(Contact.user_id == user.id, Contact.id == contact_id).first()
+async def get_contact(contact_id: int, user: User, db: AsyncSession, read_only: bool = False) -> Contact | Row:
+    stmt = contact_select(read_only).filter(Contact.user_id == user.id, Contact.id == contact_id)
+    contact = await db.execute(stmt)
+    return contact.first() if read_only else contact.scalars().first()
 
 
-async def create_contact(body: ContactModel, user: User, db: Session) -> Contact:
+async def create_contact(body: ContactModel, user: User, db: AsyncSession) -> Contact:
     contact = Contact(name=body.name, 
                       lastname=body.lastname, 
                       email=body.email, 
                       phone=body.phone, 
                       birthday=body.birthday, user_id=user.id)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await contacts_changed(user.id)
+    await db.refresh(contact)
     return contact
 
 
 
-async def remove_contact(contact_id: int, user: User, db: Session) -> Contact | None:
-    contact = db.query(Contact).filter(and_(
-            Contact.id == contact_id)).first()
+# поля, які віддає експорт
+EXPORT_COLUMNS = ("id", "name", "lastname", "email", "phone", "birthday", "age",
+                  "additional", "description", "created_at", "updated_at")
+
+
+# серверний курсор: рядки приходять пачками по batch_size, без ORM-об'єктів
+async def stream_contacts(user: User, db: AsyncSession, batch_size: int = 1000,
+                          columns: Sequence[str] = EXPORT_COLUMNS) -> AsyncIterator[Sequence[Row]]:
+    stmt = (
+        select(*[getattr(Contact, column) for column in columns])
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
+
+
+# поля, які заповнює масовий імпорт
+BULK_COLUMNS = ("name", "lastname", "email", "phone", "birthday", "birthday_doy",
+                "description", "age", "user_id")
+
+CREATE_IMPORT_TABLE = text(
+    "CREATE TEMP TABLE IF NOT EXISTS contacts_import "
+    "(name varchar, lastname varchar, email varchar, phone varchar, birthday date, "
+    "birthday_doy integer, description varchar, age integer, user_id integer) "
+    "ON COMMIT DELETE ROWS"
+)
+INSERT_FROM_IMPORT_TABLE = text(
+    f"INSERT INTO contacts ({', '.join(BULK_COLUMNS)}, additional, created_at, updated_at) "
+    f"SELECT {', '.join(BULK_COLUMNS)}, 'None', now(), now() FROM contacts_import "
+    "ON CONFLICT (email) DO NOTHING RETURNING email"
+)
+
+
+def contact_row(body: ContactModel, user: User) -> dict:
+    # Core-вставки оминають валідацію моделі Contact: без email (у ContactModel
+    # за замовчуванням це клас EmailStr) до бази пішов би не рядок
+    if not isinstance(body.email, str) or not body.email:
+        raise ValueError("Contact email is required")
+    return {
+        "name": body.name,
+        "lastname": body.lastname,
+        "email": body.email,
+        "phone": body.phone,
+        "birthday": body.birthday,
+        "birthday_doy": birthday_doy(body.birthday),
+        "description": body.description,
+        "age": body.age,
+        "user_id": user.id,
+    }
+
+
+async def copy_contacts(rows: List[dict], db: AsyncSession) -> List[str]:
+    # Postgres: COPY у тимчасову таблицю, звідти один INSERT ... SELECT
+    await db.execute(CREATE_IMPORT_TABLE)
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        "contacts_import",
+        records=[tuple(row[column] for column in BULK_COLUMNS) for row in rows],
+        columns=list(BULK_COLUMNS),
+    )
+    result = await db.execute(INSERT_FROM_IMPORT_TABLE)
+    return list(result.scalars().all())
+
+
+# один statement на пачку; контакти з email, що вже існує, пропускаються
+async def bulk_create_contacts(bodies: List[ContactModel], user: User, db: AsyncSession) -> List[str]:
+    if not bodies:
+        return []
+    use_primary(db)
+    rows = [contact_row(body, user) for body in bodies]
+
+    if dialect_name(db) == "postgresql":
+        emails = await copy_contacts(rows, db)
+    else:
+        stmt = sqlite_insert(Contact.__table__).on_conflict_do_nothing(
+            index_elements=["email"]
+        ).returning(Contact.email)
+        emails = list((await db.execute(stmt, rows)).scalars().all())
+
+    await db.commit()
+    await contacts_changed(user.id)
+    return emails
+
+
+UPSERT_BATCH_SIZE = 1000
+# що оновлює upsert у наявного контакту (email - ключ, user_id - не змінюється)
+UPSERT_COLUMNS = ("name", "lastname", "phone", "birthday", "birthday_doy", "description", "age")
+
+INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def upsert_statement(db: AsyncSession):
+    stmt = INSERTS.get(dialect_name(db), pg_insert)(Contact.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["email"],
+        set_={**{column: stmt.excluded[column] for column in UPSERT_COLUMNS}, "updated_at": func.now()},
+        # email унікальний глобально: чужі контакти не перезаписуємо
+        where=Contact.user_id == stmt.excluded.user_id,
+    )
+    if dialect_name(db) == "postgresql":
+        # xmax = 0 - рядок щойно вставлений, інакше - оновлений
+        return stmt.returning(Contact.email, literal_column("xmax = 0"))
+    return stmt.returning(Contact.email)
+
+
+async def upsert_contacts(bodies: List[ContactUpsert], user: User, db: AsyncSession) -> Tuple[int, int, int]:
+    """
+    The upsert_contacts function creates new contacts and updates existing ones
+    (matched by email) with one INSERT ... ON CONFLICT DO UPDATE per batch.
+
+    :param bodies: List[ContactUpsert]: Contacts to write; the last one wins for a repeated email
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Database session
+    :return: Numbers of created, updated and skipped (email of another user) contacts
+    """
+    use_primary(db)
+    rows = list({body.email: contact_row(body, user) for body in bodies}.values())
+    stmt = upsert_statement(db)
+    created = updated = 0
+
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        if dialect_name(db) == "postgresql":
+            result = (await db.execute(stmt, batch)).all()
+            batch_created = sum(1 for _, inserted in result if inserted)
+        else:
+            # у SQLite немає xmax: наявні email цієї пачки знаходимо заздалегідь
+            existing = set((await db.execute(
+                select(Contact.email).filter(Contact.email.in_([row["email"] for row in batch]))
+            )).scalars().all())
+            result = (await db.execute(stmt, batch)).all()
+            batch_created = sum(1 for (email,) in result if email not in existing)
+        created += batch_created
+        updated += len(result) - batch_created
+
+    await db.commit()
+    await contacts_changed(user.id)
+    return created, updated, len(rows) - created - updated
+
+
+async def remove_contact(contact_id: int, user: User, db: AsyncSession) -> Contact | None:
+    use_primary(db)
+    stmt = select(Contact).filter(and_(
+            Contact.id == contact_id))
+    contact = (await db.execute(stmt)).scalars().first()
     if contact:
-        db.delete(contact)
-        db.commit()
+        await db.delete(contact)
+        await db.commit()
+        await contacts_changed(contact.user_id)
     return contact
 
 
 # закоментовано при виконанні 14 ДЗ
-async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: Session) -> Contact | None:
-    contact = db.query(Contact).filter(Contact.id == user.id).filter(and_(Contact.id == contact_id)).first()
+async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: AsyncSession) -> Contact | None:
+    use_primary(db)
+    stmt = select(Contact).filter(Contact.id == user.id).filter(and_(Contact.id == contact_id))
+    contact = (await db.execute(stmt)).scalars().first()
     
     if contact:
         # update only transmitted values
         for field, value in body.dict(exclude_unset=True).items():
             setattr(contact, field, value)
         
-        db.commit()
+        await db.commit()
+        await contacts_changed(contact.user_id)
 
     
     return contact
 
+# масові операції: один UPDATE/DELETE ... WHERE user_id = :uid AND id IN (...) RETURNING id
+def bulk_target(user: User, db: AsyncSession, ids: Optional[List[int]], criteria: Optional[ContactFilter]) -> list:
+    clauses = [Contact.user_id == user.id]
+    if ids is not None:
+        clauses.append(Contact.id.in_(ids))
+    if criteria is not None:
+        # пошук стає підзапитом по id (FTS join/ранжування в UPDATE не працюють)
+        matched = filter_contacts(select(Contact.id), user, db, **criteria.dict()).order_by(None)
+        clauses.append(Contact.id.in_(matched))
+    return clauses
+
+
+async def bulk_update_contacts(values: ContactBulkValues, user: User, db: AsyncSession,
+                               ids: Optional[List[int]] = None, criteria: Optional[ContactFilter] = None) -> List[int]:
+    use_primary(db)
+    data = values.dict(exclude_unset=True)
+    if "birthday" in data:
+        # @validates не спрацьовує для Core UPDATE
+        data["birthday_doy"] = birthday_doy(data["birthday"])
+    stmt = (
+        update(Contact)
+        .where(*bulk_target(user, db, ids, criteria))
+        .values(**data)
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = (await db.execute(stmt)).scalars().all()
+    await db.commit()
+    await contacts_changed(user.id)
+    return sorted(updated)
+
+
+async def bulk_remove_contacts(user: User, db: AsyncSession,
+                               ids: Optional[List[int]] = None, criteria: Optional[ContactFilter] = None) -> List[int]:
+    use_primary(db)
+    stmt = (
+        delete(Contact)
+        .where(*bulk_target(user, db, ids, criteria))
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    removed = (await db.execute(stmt)).scalars().all()
+    await db.commit()
+    await contacts_changed(user.id)
+    return sorted(removed)
+
+
 # async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: Session) -> Contact | None:
 #     contact = db.query(Contact).filter(and_(Contact.user_id == user.id, Contact.id == contact_id)).first()
 
@@ -104,23 +408,39 @@ async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: S
 
 
 
+# дні народження шукаються по birthday_doy (індекс user_id, birthday_doy):
+# вікно дат перетворюється на один або два (через Новий рік) діапазони днів року
+def birthday_doy_ranges(start: date, days: int) -> List[Tuple[int, int]]:
+    if days >= 365:
+        return [(1, 366)]
+    start_doy = birthday_doy(start)
+    end_doy = birthday_doy(start + timedelta(days=days - 1))
+    if start_doy <= end_doy:
+        return [(start_doy, end_doy)]
+    return [(start_doy, 366), (1, end_doy)]
+
+
+async def get_upcoming_birthdays(user: User, db: AsyncSession, start: date, days: int,
+                                 read_only: bool = False) -> List[Contact | Row]:
+    start_doy = birthday_doy(start)
+    ranges = birthday_doy_ranges(start, days)
+    days_until = case(
+        (Contact.birthday_doy >= start_doy, Contact.birthday_doy - start_doy),
+        else_=Contact.birthday_doy + 366 - start_doy,
+    )
+    stmt = contact_select(read_only).filter(
+        Contact.user_id == user.id,
+        or_(*[Contact.birthday_doy.between(low, high) for low, high in ranges]),
+    ).order_by(days_until, Contact.id)
+
+    return await fetch_contacts(stmt, db, read_only)
+
+
 # оптимізація запиту
-async def get_week_birthdays(user: User, db: Session) -> List[Contact]:
-    # Обчислюємо початок та кінець тижня
+async def get_week_birthdays(user: User, db: AsyncSession, read_only: bool = False) -> List[Contact | Row]:
+    # Обчислюємо початок тижня
     today = datetime.now().date()
     start_of_week = today - timedelta(days=today.weekday())
-    end_of_week = start_of_week + timedelta(days=6)
-
-    # Використовуємо SQL-запит для отримання контактів з народженнями в цей тиждень
-    query = db.query(Contact).filter(
-        and_(
-            Contact.user_id == user.id,
-            extract('month', Contact.birthday) == today.month,
-            extract('day', Contact.birthday) >= start_of_week.day,
-            extract('day', Contact.birthday) <= end_of_week.day
-        )
-    )
-
-    matching_contacts = query.all()
 
-    return matching_contacts
+    # тиждень може захоплювати два місяці або Новий рік - це враховують діапазони днів року
+    return await get_upcoming_birthdays(user, db, start_of_week, 7, read_only)
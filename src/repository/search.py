@@ -0,0 +1,90 @@
+# src\repository\search.py
+import re
+from typing import List, Optional
+
+from sqlalchemy import String, column, func, literal, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from src.database.models import Contact, SEARCH_COLUMNS, contact_search_document, contact_search_vector
+
+
+# слова запиту: літери/цифри будь-якою мовою
+SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+contacts_fts = table("contacts_fts", column("rowid"), column("rank"))
+
+
+def dialect_name(db: AsyncSession) -> Optional[str]:
+    bind = getattr(db, "bind", None)
+    return getattr(getattr(bind, "dialect", None), "name", None)
+
+
+def search_terms(search_key: str) -> List[str]:
+    return SEARCH_TERM.findall(search_key.lower())
+
+
+def postgres_search(stmt: Select, search_key: str) -> Select:
+    """
+    The postgres_search function filters contacts by full-text prefix match
+    (tsvector GIN index) or by trigram word similarity (pg_trgm GIN index),
+    ranking by both, in a single query.
+
+    :param stmt: Select: Base query (already filtered by user)
+    :param search_key: str: Text typed by the user
+    :return: The ranked query
+    """
+    document = contact_search_document()
+    similar = literal(search_key, String).op("<%")(document)
+    rank = func.word_similarity(literal(search_key, String), document)
+
+    terms = search_terms(search_key)
+    if terms:
+        vector = contact_search_vector()
+        query = func.to_tsquery(literal_column("'simple'::regconfig"),
+                                " & ".join(f"{term}:*" for term in terms))
+        stmt = stmt.filter(or_(vector.op("@@")(query), similar))
+        rank = rank + func.ts_rank(vector, query)
+    else:
+        stmt = stmt.filter(similar)
+    return stmt.order_by(rank.desc(), Contact.id)
+
+
+def sqlite_search(stmt: Select, search_key: str) -> Select:
+    """
+    The sqlite_search function matches contacts through the contacts_fts FTS5 table
+    (every word as a prefix) and orders them by bm25 rank.
+
+    :param stmt: Select: Base query (already filtered by user)
+    :param search_key: str: Text typed by the user
+    :return: The ranked query
+    """
+    terms = search_terms(search_key)
+    if not terms:
+        return stmt.filter(literal(False))
+    match = " ".join(f'"{term}"*' for term in terms)
+    return (
+        stmt.join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+        .filter(literal_column("contacts_fts").op("MATCH")(match))
+        .order_by(contacts_fts.c.rank, Contact.id)
+    )
+
+
+def like_search(stmt: Select, search_key: str) -> Select:
+    # запасний варіант для інших БД: кожне слово - підрядок будь-якого поля
+    for term in search_terms(search_key):
+        stmt = stmt.filter(or_(
+            *[getattr(Contact, name).icontains(term, autoescape=True) for name in SEARCH_COLUMNS]
+        ))
+    return stmt.order_by(Contact.id)
+
+
+SEARCH_BACKENDS = {
+    "postgresql": postgres_search,
+    "sqlite": sqlite_search,
+}
+
+
+def build_search(db: AsyncSession, stmt: Select, search_key: str) -> Select:
+    backend = SEARCH_BACKENDS.get(dialect_name(db), like_search)
+    return backend(stmt, search_key)
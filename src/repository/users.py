@@ -1,18 +1,23 @@
 from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
+from src.database.replicas import use_primary
 from src.schemas import UserModel, UserResponse, UserDb
+from src.services.invalidation import user_changed
 
 from fastapi import Depends
 from src.database.conn_db import get_db
 
 
-async def get_user_by_email(email: str, db: Session = Depends(get_db)) -> User:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)) -> User:
+    stmt = select(User).filter(User.email == email)
+    user = await db.execute(stmt)
+    return user.scalars().first()
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     avatar = None
     try:
         g = Gravatar(body.email)
@@ -21,25 +26,30 @@ async def create_user(body: UserModel, db: Session) -> User:
         print(e)
     new_user = User(**body.dict(), avatar=avatar)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
-    user.refresh_token = token
-    db.commit()
+async def update_password(user: User, password_hash: str, db: AsyncSession) -> None:
+    user.password = password_hash
+    await db.commit()
+    await user_changed(user.email)
 
 
-async def confirmed_email(email: str, db: Session) -> None:
+async def confirmed_email(email: str, db: AsyncSession) -> None:
+    use_primary(db)
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_changed(email)
 
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
+    use_primary(db)
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await user_changed(email)
     return user
 
@@ -2,14 +2,14 @@ from typing import List
 
 from fastapi import (
     APIRouter, HTTPException, Depends, status, Security, 
-    BackgroundTasks, Request
+    BackgroundTasks, Request, Response
     )
 from fastapi.security import (
     OAuth2PasswordRequestForm,
     HTTPAuthorizationCredentials,
     HTTPBearer
 )
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.conn_db import get_db
 from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
@@ -17,6 +17,8 @@ from src.repository import users as repository_users
 from src.services.auth import auth_service
 from src.database.models import User
 from src.services.email import send_email 
+from src.services.refresh_tokens import refresh_tokens
+from src.services.revocation import revocation_list
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -28,7 +30,7 @@ security = HTTPBearer()
 )
 async def signup(body: UserModel, 
                  background_tasks: BackgroundTasks, request: Request,
-                 db: Session = Depends(get_db)):
+                 db: AsyncSession = Depends(get_db)):
     """
     The signup function creates a new user in the database.
         It also sends an email to the user with a link to confirm their account.
@@ -38,7 +40,7 @@ async def signup(body: UserModel,
     :param body: UserModel: Get the user data from the request body
     :param background_tasks: BackgroundTasks: Add a task to the background
     :param request: Request: Get the base url of the application
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: A dictionary with the user and a detail message
     :doc-author: Trelent
     """
@@ -47,7 +49,7 @@ async def signup(body: UserModel,
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.hash_password(body.password)
     new_user = await repository_users.create_user(body, db)
 
     background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
@@ -59,7 +61,7 @@ async def signup(body: UserModel,
 # витягує користувача з бази даних з його email
 @router.post("/login", response_model=TokenModel)
 async def login(
-    body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
     """
     The login function is used to authenticate a user.
@@ -67,7 +69,7 @@ async def login(
     The access token can be used in subsequent requests to identify the authenticated user.
     
     :param body: OAuth2PasswordRequestForm: Get the username and password from the request body
-    :param db: Session: Get a database session
+    :param db: AsyncSession: Get a database session
     :return: The access_token and refresh_token
     :doc-author: Trelent
     """
@@ -100,14 +102,19 @@ async def login(
         if not user.confirmed:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed"
         )
-        if not auth_service.verify_password(body.password, user.password):
+        valid, new_hash = await auth_service.verify_and_update_password(body.password, user.password)
+        if not valid:
             raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
         )
+        if new_hash:
+            # змінилась вартість bcrypt - зберігаємо хеш з новими rounds
+            await repository_users.update_password(user, new_hash, db)
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await repository_users.update_token(user, refresh_token, db)
+    # нова сім'я refresh-токенів у Redis; таблицю users не чіпаємо
+    family, jti = await refresh_tokens.start(user.email)
+    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email, "fam": family, "jti": jti})
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -115,12 +122,11 @@ async def login(
     }
 
 
-# декодує токен оновлення refresh_token та витягує відповідного користувача з бази даних
-# потім створює/оновлює нові токени
+# декодує токен оновлення refresh_token, перевіряє його сім'ю в Redis
+# потім створює/оновлює нові токени (без запису в БД)
 @router.get("/refresh_token", response_model=TokenModel)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db),
 ):
     """
     The refresh_token function is used to refresh the access token.
@@ -128,23 +134,20 @@ async def refresh_token(
         a new refresh_token, and the type of token (bearer).
     
     :param credentials: HTTPAuthorizationCredentials: Get the token from the request headers
-    :param db: Session: Get the database session
-    :param : Get the user's email from the token
     :return: An object with the following properties:
     :doc-author: Trelent
     """
-    token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        await repository_users.update_token(user, None, db)
+    payload = await auth_service.decode_refresh_payload(credentials.credentials)
+    email, family, jti = payload["sub"], payload.get("fam"), payload.get("jti")
+    if not family or not jti:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
         )
+    # ротація в Redis: старий токен більше не дійсний, повторне використання відкликає сім'ю
+    next_jti = await refresh_tokens.rotate(email, family, jti)
 
     access_token = await auth_service.create_access_token(data={"sub": email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    await repository_users.update_token(user, refresh_token, db)
+    refresh_token = await auth_service.create_refresh_token(data={"sub": email, "fam": family, "jti": next_jti})
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -152,6 +155,70 @@ async def refresh_token(
     }
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(credentials: HTTPAuthorizationCredentials = Security(security)):
+    """
+    The logout function revokes the token family of the presented refresh token,
+    so neither it nor any token rotated from the same login can be refreshed again.
+
+    :param credentials: HTTPAuthorizationCredentials: Refresh token from the request headers
+    :return: None
+    """
+    payload = await auth_service.decode_refresh_payload(credentials.credentials)
+    if payload.get("fam"):
+        await refresh_tokens.revoke(payload["sub"], payload["fam"])
+
+
+@router.post("/logout_all")
+async def logout_all(current_user: User = Depends(auth_service.get_current_user),
+                     token: str = Depends(auth_service.oauth2_scheme)):
+    """
+    The logout_all function revokes every refresh token family of the current user
+    (logout on all devices) and the access token used for this request.
+
+    :param current_user: User: The authenticated user
+    :param token: str: Access token of the request
+    :return: The number of revoked sessions
+    """
+    revoked = await refresh_tokens.revoke_all(current_user.email)
+    await revoke_access_token(token)
+    return {"revoked": revoked}
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(current_user: User = Depends(auth_service.get_current_user),
+                 token: str = Depends(auth_service.oauth2_scheme)):
+    """
+    The revoke function revokes the access token used for this request before it expires.
+
+    :param current_user: User: The authenticated user
+    :param token: str: Access token of the request
+    :return: None
+    """
+    await revoke_access_token(token)
+
+
+async def revoke_access_token(token: str) -> None:
+    payload = auth_service.decode_access_token(token)
+    if payload.get("jti"):
+        await revocation_list.revoke(payload["jti"], payload["exp"])
+
+
+@router.get("/jwks.json")
+async def jwks(response: Response):
+    """
+    The jwks function publishes the public keys of the JWT key ring (JWK Set),
+    so other services verify access tokens locally by the kid in the token header
+    instead of sharing the secret or calling this API.
+
+    :param response: Response: Used to set the Cache-Control header
+    :return: A dict with the list of public keys
+    """
+    # клієнти кешують набір і перезавантажують його, коли бачать невідомий kid
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return auth_service.keyring.jwks()
+
+
 # @router.get("/")
 # async def root():
 #     return {"message": "Hello REST API Authorization"}
@@ -164,7 +231,7 @@ async def read_item(current_users: User = Depends(auth_service.get_current_user)
 
 # + hw13
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     The confirmed_email function is used to confirm a user's email address.
         It takes the token from the URL and uses it to get the user's email address.
@@ -175,7 +242,7 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
         with that email as its
     
     :param token: str: Get the token from the url
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: A dict with the message
     :doc-author: Trelent
     """
@@ -193,7 +260,7 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 @router.post('/request_email')
 async def request_email(body: RequestEmail, 
                         background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+                        db: AsyncSession = Depends(get_db)):
     user = await repository_users.get_user_by_email(body.email, db)
 
     if user.confirmed:
@@ -1,20 +1,29 @@
 # src\routes\contacts.py
 
 from typing import List, Optional
+from datetime import date
 
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
-from fastapi_limiter.depends import RateLimiter #speed limit request
-from sqlalchemy.orm import Session
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, Response, UploadFile, File, Body
+from src.services.rate_limit import limiter #speed limit request
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.database.conn_db import get_db
 from src.database.models import User
-from src.schemas import ContactModel, ContactUpdate, ContactResponse
+from src.schemas import (ContactModel, ContactUpdate, ContactResponse, ContactImportResponse,
+                         ContactBulkUpdate, ContactBulkTarget, ContactBulkResponse,
+                         ContactUpsert, ContactUpsertResponse, MAX_UPSERT_CONTACTS)
 
 from src.repository import contacts as repository_contacts
 # from src.repository.contacts import repository_contacts
 
 from src.services.auth import auth_service
+from src.services import contacts_cache
+from src.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from src.services.contacts_import import detect_format, import_contacts as import_contacts_service
+from src.services.contacts_export import EXPORT_MEDIA_TYPES, export_contacts as export_contacts_service
+from src.services.metrics import TimedJSONResponse
+from src.services.fieldsets import parse_fields
 
 
 
@@ -22,57 +31,124 @@ router = APIRouter(prefix='/contacts')
 
 # за замовчуванням
 # @router.get("/", response_model=List[ContactResponse], name='return contacts1')
-# async def get_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+# async def get_contacts(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
 #     contacts = await repository_contacts.get_contacts(skip, limit, db)
 #     return contacts
 
+# списки контактів уже серіалізовані через contacts_cache.contact_list, тому маршрути
+# повертають TimedJSONResponse напряму: FastAPI не перевіряє їх вдруге через response_model
+# (він лишається для документації; з fields= у відповіді лише вибрані поля і id)
+FIELDS_DESCRIPTION = "Comma separated fields to return, e.g. name,lastname (id is always returned)"
+
 @router.get("/", response_model=List[ContactResponse], name='return contacts2',
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],)
-async def read_contacts(contact_id: int | None = None, db: Session = Depends(get_db), 
+    dependencies=[Depends(limiter.limit("contacts_list", times=10, seconds=60))],)
+async def read_contacts(contact_id: int | None = None,
+                        limit: int = Query(100, ge=1, le=1000),
+                        cursor: str | None = None,
+                        order: str = Query("id", pattern="^(id|name)$"),
+                        fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+                        db: AsyncSession = Depends(get_db), 
                         current_user: User = Depends(auth_service.get_current_user)):
     """
     The read_contacts function returns a list of contacts.
     If contact_id is specified, it will return only the contact with that id.
+    Otherwise contacts are paginated by cursor: the cursor of the next page
+    is returned in the X-Next-Cursor header (absent on the last page).
+    With fields only the listed columns are read from the database and returned.
     
     
     :param contact_id: int | None: Determine if the function is being called to get a single contact or all contacts
-    :param db: Session: Pass the database session to the function
+    :param limit: int: Page size
+    :param cursor: str | None: Cursor from the X-Next-Cursor header of the previous page
+    :param order: str: Sort by id or by name
+    :param fields: str | None: Comma separated fields to return
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the current user
     :return: A list of contacts
     :doc-author: Trelent
     """
+    columns = parse_fields(fields, contacts_cache.CONTACT_FIELDS, required=("id",))
     if contact_id is not None:
-        contact = await repository_contacts.get_contact(contact_id, current_user, db)
+        contact = await contacts_cache.get_contact(contact_id, current_user, db)
         if contact is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
-        return [contact]
+        return TimedJSONResponse(contacts_cache.select_fields([contact], columns))
     else:
-        contacts = await repository_contacts.get_contacts(0, 100, db)
-        return contacts
+        after = decode_cursor(cursor, order)
+        contacts, next_key = await contacts_cache.get_contacts_page(current_user, db, limit, order, after, columns)
+        headers = {NEXT_CURSOR_HEADER: encode_cursor(order, next_key)} if next_key is not None else None
+        return TimedJSONResponse(contacts, headers=headers)
 
 # +
+# має стояти перед /{contact_id}, інакше "export" сприймається як id
+@router.get("/export", response_class=StreamingResponse, name='export contacts')
+async def export_contacts(format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                          gzip: bool = False,
+                          fields: str | None = Query(None, description="Comma separated columns to export"),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The export_contacts function downloads the whole address book of the user.
+        Contacts are ordered by id and streamed from a server-side cursor,
+        so the response starts at once and memory use stays flat.
+        With fields only the listed columns are selected and written.
+    
+    :param format: str: ndjson (one JSON object per line) or csv
+    :param gzip: bool: Compress the file with gzip
+    :param fields: str | None: Comma separated columns to export, all columns if omitted
+    :param current_user: User: Owner of the contacts
+    :return: A streamed file
+    """
+    columns = parse_fields(fields, repository_contacts.EXPORT_COLUMNS)
+    filename = f"contacts.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else EXPORT_MEDIA_TYPES[format]
+    return StreamingResponse(export_contacts_service(current_user, format, gzip, columns), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 # @router.get("/{contact_id}", response_model=ContactResponse)
-# async def read_contact(contact_id: int, db: Session = Depends(get_db)):
+# async def read_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
 #     contact = await repository_contacts.get_contact(contact_id, db)
 #     if contact is None:
 #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
 #     return contact
 
 @router.get("/{contact_id}", response_model=List[ContactResponse], name='get id')
-async def read_contacts(limit: int = Query(10, le=1000), offset: int = 0, contact_id: int | None = None, db: Session = Depends(get_db), 
-                        current_user: User = Depends(auth_service.get_current_user)):
-    if contact_id is not None:
-        contact = await repository_contacts.get_contact(contact_id, current_user, db)
-        if contact is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
-        return [contact]
-    else:
-        contacts = await repository_contacts.get_contacts(limit, offset, 0, 100, db)
-        return contacts
+async def read_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db), 
+                       current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The read_contact function returns the contact with the given id as a one-item list.
+    
+    :param contact_id: int: Id of the contact
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: A list with one contact
+    """
+    contact = await contacts_cache.get_contact(contact_id, current_user, db)
+    if contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return TimedJSONResponse([contact])
 
 # +
+# має стояти перед /{contact_id}
+@router.put("/upsert", response_model=ContactUpsertResponse, name='upsert contacts')
+async def upsert_contacts(body: List[ContactUpsert] = Body(max_length=MAX_UPSERT_CONTACTS),
+                          db: AsyncSession = Depends(get_db), 
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The upsert_contacts function syncs a batch of contacts keyed by email:
+        new emails are created, known ones are updated in place.
+        Sending the same batch again changes nothing but updated_at.
+    
+    :param body: List[ContactUpsert]: Contacts to create or update, email is required
+    :param db: AsyncSession: Pass the database session to the repository layer
+    :param current_user: User: Owner of the contacts
+    :return: Numbers of created, updated and skipped contacts
+    """
+    created, updated, skipped = await repository_contacts.upsert_contacts(body, current_user, db)
+    return {"created": created, "updated": updated, "skipped": skipped}
+
+
 @router.put("/{contact_id}", response_model=ContactResponse, name='update contacts')
-async def update_contact(body: ContactUpdate, contact_id: int, db: Session = Depends(get_db), 
+async def update_contact(body: ContactUpdate, contact_id: int, db: AsyncSession = Depends(get_db), 
                          current_user: User = Depends(auth_service.get_current_user)):
     contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
     if contact is None:
@@ -81,29 +157,86 @@ async def update_contact(body: ContactUpdate, contact_id: int, db: Session = Dep
 
 # +
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
-async def create_contact(body: ContactModel, db: Session = Depends(get_db), 
+async def create_contact(body: ContactModel, db: AsyncSession = Depends(get_db), 
                          current_user: User = Depends(auth_service.get_current_user)):
     """
     The create_contact function creates a new contact in the database.
         The function takes in a ContactModel object and returns the newly created contact.
     
     :param body: ContactModel: Pass the contact information to be created
-    :param db: Session: Pass the database session to the repository layer
+    :param db: AsyncSession: Pass the database session to the repository layer
     :param current_user: User: Get the user id from the token
     :return: A contactmodel object
     :doc-author: Trelent
     """
     return await repository_contacts.create_contact(body, current_user, db)
 
+# bulk import: CSV (заголовок - поля ContactModel), JSONL або vCard
+@router.post("/import", response_model=ContactImportResponse, name='import contacts')
+async def import_contacts(file: UploadFile = File(),
+                          format: str | None = Query(None, pattern="^(csv|jsonl|vcard)$"),
+                          db: AsyncSession = Depends(get_db), 
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The import_contacts function imports many contacts from an uploaded file.
+        The file is read as a stream, rows are validated in batches and inserted
+        with one statement per batch. Invalid rows and emails that already exist
+        are reported with their row number instead of aborting the import.
+    
+    :param file: UploadFile: CSV, JSONL or vCard file
+    :param format: str | None: File format; detected from the file extension if omitted
+    :param db: AsyncSession: Pass the database session to the repository layer
+    :param current_user: User: Owner of the imported contacts
+    :return: Import counters, per-row errors and throughput
+    """
+    file_format = detect_format(file.filename, format)
+    if file_format is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, 
+                            detail="Unknown file format, use csv, jsonl or vcard")
+    return await import_contacts_service(file.file, file_format, current_user, db)
+
 # +
 @router.delete("/{contact_id}", response_model=ContactResponse)
-async def remove_contact(contact_id: int = Path(ge=1), db: Session = Depends(get_db), 
+async def remove_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db), 
                          current_user: User = Depends(auth_service.get_current_user)):
     contact = await repository_contacts.remove_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return contact
 
+@router.post("/bulk/update", response_model=ContactBulkResponse, name='bulk update contacts')
+async def bulk_update_contacts(body: ContactBulkUpdate, db: AsyncSession = Depends(get_db), 
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The bulk_update_contacts function sets the same values on many contacts at once.
+        Contacts are chosen by a list of ids and/or a search filter and changed
+        with a single UPDATE statement.
+    
+    :param body: ContactBulkUpdate: Ids and/or filter plus the values to set
+    :param db: AsyncSession: Pass the database session to the repository layer
+    :param current_user: User: Only contacts of this user are changed
+    :return: The number and ids of the updated contacts
+    """
+    ids = await repository_contacts.bulk_update_contacts(body.values, current_user, db, body.ids, body.filter)
+    return {"count": len(ids), "ids": ids}
+
+
+@router.post("/bulk/delete", response_model=ContactBulkResponse, name='bulk delete contacts')
+async def bulk_remove_contacts(body: ContactBulkTarget, db: AsyncSession = Depends(get_db), 
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The bulk_remove_contacts function deletes many contacts at once.
+        Contacts are chosen by a list of ids and/or a search filter and removed
+        with a single DELETE statement.
+    
+    :param body: ContactBulkTarget: Ids and/or filter of the contacts to delete
+    :param db: AsyncSession: Pass the database session to the repository layer
+    :param current_user: User: Only contacts of this user are removed
+    :return: The number and ids of the deleted contacts
+    """
+    ids = await repository_contacts.bulk_remove_contacts(current_user, db, body.ids, body.filter)
+    return {"count": len(ids), "ids": ids}
+
 # +
 @router.get("/search/", response_model=List[ContactResponse], name='search by params')
 async def search_contacts(
@@ -111,46 +244,61 @@ async def search_contacts(
     name: Optional[str] = None,
     lastname: Optional[str] = None,
     email: Optional[str] = None,
-    db: Session = Depends(get_db), 
+    limit: int = Query(50, ge=1, le=500),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(auth_service.get_current_user)
 ):
     """
     The search_contacts function searches for contacts in the database.
-        It can search by name, lastname, email or any combination of these fields.
-        The function returns a list of contacts that match the search criteria.
+        search_key is matched by word prefixes (and typos on Postgres) against name, lastname, 
+        email, phone and description; name, lastname and email narrow the result by prefix.
+        The function returns the matching contacts, best matches first.
+        With fields only the listed columns are read from the database and returned.
     
     :param search_key: Optional[str]: Search for a contact by any of the fields in the database
     :param name: Optional[str]: Search for a contact by name
-    :param lastname: Optional[str]: Search by lastname, but the function is not used anywhere in the code
+    :param lastname: Optional[str]: Search for a contact by lastname
     :param email: Optional[str]: Search for contacts by email
-    :param db: Session: Pass the database session to the repository layer
+    :param limit: int: Maximum number of contacts returned
+    :param fields: str | None: Comma separated fields to return
+    :param db: AsyncSession: Pass the database session to the repository layer
     :param current_user: User: Get the user that is currently logged in
     :return: A list of contacts
     :doc-author: Trelent
     """
+    columns = parse_fields(fields, contacts_cache.CONTACT_FIELDS, required=("id",))
     contacts = await repository_contacts.search_contacts(
         user=current_user,
         search_key=search_key,
         name=name,
         lastname=lastname,
         email=email,
+        limit=limit,
+        fields=columns,
+        read_only=True,
         db=db
     )
-    return contacts
+    return TimedJSONResponse(contacts_cache.contacts_json(contacts, columns))
 
 # +
 @router.get("/week_birthdays/", response_model=List[ContactResponse], name='birthdays')
-async def get_week_birthdays(db: Session = Depends(get_db), 
+async def get_week_birthdays(days: int | None = Query(None, ge=1, le=366),
+                             db: AsyncSession = Depends(get_db), 
                              current_user: User = Depends(auth_service.get_current_user)):
     """
-    The get_week_birthdays function returns a list of contacts with birthdays in the next 7 days.
-        The function takes two parameters: db and current_user. 
+    The get_week_birthdays function returns a list of contacts with birthdays in the current week.
+        With days=N it returns the birthdays of the next N days starting today instead,
+        sorted by the number of days left.
         The db parameter is used to connect to the database, while current_user is used for authentication purposes.
     
-    :param db: Session: Pass the database session to the function
+    :param days: int | None: Number of upcoming days to look at
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the user_id from the database
-    :return: A list of contacts that have a birthday in the current week
+    :return: A list of contacts that have a birthday in the current week (or the next N days)
     :doc-author: Trelent
     """
-    contacts = await repository_contacts.get_week_birthdays(current_user, db)
-    return contacts
\ No newline at end of file
+    if days is not None:
+        return TimedJSONResponse(await contacts_cache.get_upcoming_birthdays(current_user, db, date.today(), days))
+    contacts = await contacts_cache.get_week_birthdays(current_user, db)
+    return TimedJSONResponse(contacts)
\ No newline at end of file
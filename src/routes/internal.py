@@ -0,0 +1,69 @@
+# src\routes\internal.py
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Security, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from src.config import settings
+from src.database.conn_db import engine, replicas
+from src.database.pool import pool_status
+from src.services.cache import contact_cache, user_cache
+from src.services.refresh_tokens import refresh_tokens
+from src.services.revocation import revocation_list
+from src.services.rate_limit import limiter
+from src.services.invalidation import invalidation_bus
+
+
+internal_auth = HTTPBearer(auto_error=False)
+
+
+async def require_internal_token(
+        credentials: Optional[HTTPAuthorizationCredentials] = Security(internal_auth)) -> None:
+    """
+    The require_internal_token function guards the service endpoints (/api/internal/*, /metrics):
+    they expose pool, cache and timing counters, so only a caller with INTERNAL_TOKEN
+    (e.g. Prometheus via bearer_token) can read them. Without the setting they are disabled.
+
+    :param credentials: Optional[HTTPAuthorizationCredentials]: Authorization: Bearer header
+    :return: None
+    """
+    if not settings.internal_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(),
+                                                      settings.internal_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/db_pool")
+async def db_pool():
+    """
+    The db_pool function returns the connection pool counters of this worker:
+    checked-out, idle and overflow connections plus checkout wait times,
+    and the lag of every read replica.
+
+    :return: A dict with the pool status
+    """
+    status = pool_status(engine)
+    status["replicas"] = [
+        dict(replica.as_dict(), pool=pool_status(replica.engine)) for replica in replicas.replicas
+    ]
+    return status
+
+
+@router.get("/cache")
+async def cache():
+    """
+    The cache function returns the hit/miss counters of the contact and user caches
+    in this worker and the counters of the invalidation bus.
+
+    :return: A dict with the cache counters and hit rates
+    """
+    return dict(contact_cache.stats(), users=user_cache.stats(), bus=invalidation_bus.stats(),
+                refresh_tokens=refresh_tokens.stats(), revocation=revocation_list.stats(),
+                rate_limit=limiter.stats())
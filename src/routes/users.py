@@ -1,6 +1,6 @@
 # src\routes\users.py
 from fastapi import APIRouter, Depends, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.database.conn_db import get_db
@@ -46,7 +46,7 @@ async def read_me(current_user: User = Depends(auth_service.get_current_user)):
 async def update_avatar_user(
     file: UploadFile = File(), 
     current_user: User = Depends(auth_service.get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     The update_avatar_user function updates the avatar of a user.
@@ -54,11 +54,11 @@ async def update_avatar_user(
     Args:
         file (UploadFile): The file to be uploaded.
         current_user (User): The currently logged in user. This is passed by the auth_service dependency, which uses JWT tokens to authenticate users and pass them into functions as dependencies when they are logged in. If no token is present, this will return None and raise an HTTPException with status code 401 UNAUTHORIZED, which means "you must log in first".
-        db (Session): A database Session instance provided by SQLAlchemy's sc
+        db (AsyncSession): A database AsyncSession instance provided by SQLAlchemy's sc
     
     :param file: UploadFile: Get the file from the request
     :param current_user: User: Get the current user information
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: A userresponse object
     :doc-author: Trelent
     """
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, create_model, model_validator
+from typing import List, Optional, Sequence, Type
 from datetime import datetime, date
 
 
@@ -18,20 +18,29 @@ class ContactModel(BaseModel):
 
  # get
 class ContactResponse(BaseModel):
+    # у shemas подружить  models з orm базою даних (pydantic v2: from_attributes замість orm_mode)
+    model_config = ConfigDict(from_attributes=True)
+
     id: int = 1
     name: Optional[str] = None
     lastname: Optional[str] = None
-    email: EmailStr
+    # на виході email не перевіряється вдруге (email-validator - найдорожча частина
+    # серіалізації списку); у схемі OpenAPI він так само format: email
+    email: str = Field(json_schema_extra={"format": "email"})
     phone: Optional[str] = None
     birthday: date | None
     description: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
-    # у shemas подружить  models через class Config з orm базою даних
-    class Config:
-        # from_attributes = True
-        orm_mode = True
+
+# fields= : ContactResponse лише з вибраними полями
+def contact_response_model(fields: Sequence[str]) -> Type[BaseModel]:
+    return create_model(
+        f"ContactResponse[{','.join(fields)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (ContactResponse.model_fields[name].annotation, ContactResponse.model_fields[name]) for name in fields},
+    )
 
 
 
@@ -46,6 +55,84 @@ class ContactUpdate(BaseModel):
 
 
 
+# bulk import
+class ContactImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ContactImportResponse(BaseModel):
+    format: str
+    total: int
+    imported: int
+    failed: int
+    errors: List[ContactImportError] = []
+    seconds: float
+    rows_per_second: float
+
+
+# bulk update / delete
+MAX_BULK_IDS = 10000
+
+
+class ContactFilter(BaseModel):
+    search_key: Optional[str] = None
+    name: Optional[str] = None
+    lastname: Optional[str] = None
+    email: Optional[str] = None
+
+
+class ContactBulkValues(BaseModel):
+    # email унікальний - масово не змінюється
+    name: Optional[str] = None
+    lastname: Optional[str] = None
+    phone: Optional[str] = None
+    birthday: Optional[date] = None
+    description: Optional[str] = None
+
+
+class ContactBulkTarget(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=MAX_BULK_IDS)
+    filter: Optional[ContactFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.ids is None and self.filter is None:
+            raise ValueError("ids or filter is required")
+        return self
+
+
+class ContactBulkUpdate(ContactBulkTarget):
+    values: ContactBulkValues
+
+    @model_validator(mode="after")
+    def check_values(self):
+        if not self.values.model_fields_set:
+            raise ValueError("values must not be empty")
+        return self
+
+
+class ContactBulkResponse(BaseModel):
+    count: int
+    ids: List[int]
+
+
+# upsert by email
+MAX_UPSERT_CONTACTS = 10000
+
+
+class ContactUpsert(ContactModel):
+    # email - ключ upsert, тому обов'язковий і перевірений (у ContactModel його можна не передати)
+    email: EmailStr
+
+
+class ContactUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+
+
+
 # Users
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
@@ -1,23 +1,42 @@
 # src\services\auth.py
-from typing import Optional
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
 from src.database.conn_db import get_db
+from src.database.replicas import read_staleness
 from src.repository import users as repository_users
 from src.database.models import User
 from src.schemas import UserResponse, UserDb
+from src.services.cache import user_cache
+from src.services.keyring import KeyRing
+from src.services.metrics import phase
+from src.services.refresh_tokens import REFRESH_TOKEN_TTL
+from src.services.revocation import revocation_list
 
 
 import logging
 logger = logging.getLogger(__name__)
 
 AUTH_LOGIN_URL = "/api/auth/login"
+# чим довше існує access_token, тим більше часу має зловмисник у разі злому аккаунта
+ACCESS_TOKEN_TTL = timedelta(weeks=2)
+EMAIL_TOKEN_TTL = timedelta(days=7)
+# найдовший строк життя токена, який видає сервіс
+MAX_TOKEN_TTL = max(ACCESS_TOKEN_TTL, REFRESH_TOKEN_TTL, EMAIL_TOKEN_TTL)
 
 class Auth:
     # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -31,10 +50,24 @@ class Auth:
 # from src.repository import users as repository_users
 
     def __init__(self, schemes: list, deprecated: str, 
-                 secret_key: str, algorithm: str, token_url: str = AUTH_LOGIN_URL):
-        self.pwd_context = CryptContext(schemes=schemes, deprecated=deprecated)
+                 secret_key: str, algorithm: str, token_url: str = AUTH_LOGIN_URL,
+                 bcrypt_rounds: int = 12, hash_workers: Optional[int] = None,
+                 token_cache_size: int = 10000, keyring: Optional[KeyRing] = None):
+        # min = max = default: хеші з іншою вартістю позначаються як застарілі (rehash при логіні)
+        self.pwd_context = CryptContext(schemes=schemes, deprecated=deprecated,
+                                        bcrypt__default_rounds=bcrypt_rounds,
+                                        bcrypt__min_rounds=bcrypt_rounds,
+                                        bcrypt__max_rounds=bcrypt_rounds)
+        # bcrypt відпускає GIL, тож потоки рахують паралельно, а event loop не блокується
+        self.hash_executor = ThreadPoolExecutor(max_workers=hash_workers or os.cpu_count() or 1,
+                                                thread_name_prefix="bcrypt")
+        # перевірені access-токени: sha256(token) -> (kid, payload), до закінчення exp
+        self.token_cache: OrderedDict = OrderedDict()
+        self.token_cache_size = token_cache_size
         self.SECRET_KEY = secret_key
         self.ALGORITHM = algorithm
+        # без зв'язки ключів - лише HS256 зі спільним секретом
+        self.keyring = keyring or KeyRing(secret_key=secret_key, secret_algorithm=algorithm)
         self.oauth2_scheme = OAuth2PasswordBearer(tokenUrl=token_url, auto_error=False)
         # self.oauth2_scheme = OAuth2PasswordBearer(tokenUrl=token_url)
 
@@ -46,6 +79,24 @@ class Auth:
     def get_password_hash(self, password: str):
         return self.pwd_context.hash(password)
 
+    async def hash_password(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hash_executor, self.pwd_context.hash, password)
+
+    async def verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        The verify_and_update_password function checks the password in the bcrypt thread pool.
+        If the stored hash was made with other bcrypt rounds than configured,
+        it also returns a new hash to be saved.
+
+        :param plain_password: str: Password from the login form
+        :param hashed_password: str: Hash stored in the database
+        :return: (is the password valid, new hash or None)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hash_executor, self.pwd_context.verify_and_update,
+                                          plain_password, hashed_password)
+
 
 
     # define a function to generate a new access token
@@ -54,10 +105,10 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            # чим довше існує access_token, тим більше часу має зловмисник у разі злому аккаунта
-            expire = datetime.utcnow() + timedelta(weeks=2) 
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"})
-        encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+            expire = datetime.utcnow() + ACCESS_TOKEN_TTL
+        # jti - щоб токен можна було відкликати до exp
+        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token", "jti": uuid.uuid4().hex})
+        encoded_access_token = self.keyring.encode(to_encode)
         return encoded_access_token
 
     # define a function to generate a new refresh token
@@ -66,46 +117,91 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.utcnow() + timedelta(days=7)
+            # TTL сім'ї в RefreshTokenStore такий самий
+            expire = datetime.utcnow() + REFRESH_TOKEN_TTL
         to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token"})
-        encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        encoded_refresh_token = self.keyring.encode(to_encode)
         return encoded_refresh_token
 
-    async def decode_refresh_token(self, refresh_token: str):
+    async def decode_refresh_payload(self, refresh_token: str) -> dict:
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.keyring.decode(refresh_token)
             if payload['scope'] == 'refresh_token':
-                email = payload['sub']
-                return email
+                return payload
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid scope for token')
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
+    async def decode_refresh_token(self, refresh_token: str):
+        payload = await self.decode_refresh_payload(refresh_token)
+        return payload['sub']
+
+
+    def decode_access_token(self, token: str) -> dict:
+        """
+        The decode_access_token function verifies the JWT once and then serves
+        the payload from a bounded LRU cache keyed by the token hash until the token expires,
+        as long as the key that signed it is still in the key ring.
 
-    # async def get_current_user(self, token: str = Depends(lambda: self.oauth2_scheme), db: Session = Depends(get_db)):
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+        :param token: str: Access token from the Authorization header
+        :return: The verified payload
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self.token_cache.get(key)
+        if entry is not None:
+            kid, payload = entry
+            if payload["exp"] > time.time() and self.keyring.accepts(kid):
+                self.token_cache.move_to_end(key)
+                return payload
+            # прострочений, його ключ вилучено зі зв'язки або HS256 вже не приймається
+            del self.token_cache[key]
+
+        payload = self.keyring.decode(token)
+        if isinstance(payload.get("exp"), (int, float)):
+            self.token_cache[key] = (jwt.get_unverified_header(token).get("kid"), payload)
+            if len(self.token_cache) > self.token_cache_size:
+                self.token_cache.popitem(last=False)
+        return payload
+
+    # async def get_current_user(self, token: str = Depends(lambda: self.oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+        if not token:
+            raise credentials_exception
+
         try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload['scope'] == 'access_token':
+            # Decode JWT (перевірений payload кешується до exp)
+            with phase("auth"):
+                payload = self.decode_access_token(token)
+            if payload.get('scope') == 'access_token':
                 email = payload["sub"]
                 if email is None:
                     raise credentials_exception
             else:
                 raise credentials_exception
         except JWTError as e:
-            logger.error(f"JWT Error: {e}, Token: {token}")
+            # сам токен не логуємо
+            logger.error(f"JWT Error: {e}")
+            raise credentials_exception
+
+        # фільтр відповідає "ні" для майже всіх токенів; Redis - лише при збігу
+        jti = payload.get("jti")
+        with phase("revocation"):
+            revoked = jti and revocation_list.maybe_revoked(jti) and await revocation_list.confirm(jti)
+        if revoked:
             raise credentials_exception
-        
-        logger.info(f"Decoded Token: {token}, Payload: {payload}, Email: {email}")
 
-        user = await repository_users.get_user_by_email(email, db)
+        # кеш знімає запит до БД з кожного автентифікованого запиту;
+        # update_password/confirmed_email/update_avatar інвалідують його через шину,
+        # а прочитане з репліки, що ще не бачить зміни, не кешується
+        with phase("user"):
+            user = await user_cache.get_or_load(email, lambda: repository_users.get_user_by_email(email, db),
+                                                lambda: read_staleness(db))
         if user is None:
             raise credentials_exception
         return user
@@ -113,14 +209,14 @@ class Auth:
 
     def create_email_token(self, data: dict):
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=7)
+        expire = datetime.utcnow() + EMAIL_TOKEN_TTL
         to_encode.update({"iat": datetime.utcnow(), "exp": expire})
-        token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        token = self.keyring.encode(to_encode)
         return token
     
     async def get_email_from_token(self, token: str):
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.keyring.decode(token)
             email = payload["sub"]
             return email
         except JWTError as e:
@@ -129,7 +225,7 @@ class Auth:
                                 detail="Invalid token for email verification")
 
 
-    async def update_avatar(self, email: str, url: str, db: Session) -> UserDb:
+    async def update_avatar(self, email: str, url: str, db: AsyncSession) -> UserDb:
         user = await repository_users.update_avatar(email, url, db)
         return user
 
@@ -140,8 +236,24 @@ class Auth:
 auth_service = Auth(
     schemes=["bcrypt"],
     deprecated="auto",
-    secret_key="secret_key",
-    algorithm="HS256",
+    secret_key=settings.secret_key,
+    algorithm=settings.algorithm,
     # token_url=AUTH_LOGIN_URL
+    bcrypt_rounds=settings.bcrypt_rounds,
+    hash_workers=settings.password_hash_workers,
+    token_cache_size=settings.token_cache_size,
+    # RS256/ES256 з kid, якщо задано каталог ключів; токени без kid після переходу
+    # приймаються за секретом лише до JWT_LEGACY_UNTIL (не довше за найдовший строк життя токена)
+    keyring=KeyRing(
+        keys_dir=settings.jwt_keys_dir,
+        algorithm=settings.jwt_key_algorithm,
+        max_keys=settings.jwt_max_keys,
+        activate_after=settings.jwt_key_activate_after,
+        secret_key=settings.secret_key,
+        secret_algorithm=settings.algorithm,
+        legacy_until=settings.jwt_legacy_until,
+        legacy_max_age=MAX_TOKEN_TTL.total_seconds(),
+    ),
 )
+auth_service.keyring.load()
 
@@ -0,0 +1,348 @@
+# src\services\cache.py
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.config import settings
+from src.database.models import User
+
+
+logger = logging.getLogger(__name__)
+
+
+# межа, за якою відставання репліки вважається невідомим (і прочитане з неї не кешується)
+CHANGES_HORIZON = 60.0
+
+
+class RecentChanges:
+    """
+    Коли (time.monotonic) цей воркер дізнався про зміну ключа - з шини інвалідації,
+    за останні horizon секунд. Потрібно, щоб не кешувати прочитане з репліки,
+    яка ще не застосувала цю зміну.
+    """
+
+    def __init__(self, horizon: float = CHANGES_HORIZON):
+        self.horizon = horizon
+        self.times: OrderedDict = OrderedDict()     # key -> час зміни, від найстаріших
+        self.all_at = float("-inf")                 # reset шини: змінитися могло що завгодно
+
+    def mark(self, key: Optional[str]) -> None:
+        now = time.monotonic()
+        if key is None:
+            self.all_at = now
+            self.times.clear()
+            return
+        self.times[key] = now
+        self.times.move_to_end(key)
+        while self.times and next(iter(self.times.values())) < now - self.horizon:
+            self.times.popitem(last=False)
+
+    def may_be_stale(self, key: str, started: float, lag: Optional[float]) -> bool:
+        # дані, прочитані після started з відставанням lag, відбивають усі зміни до started - lag
+        if lag is None or lag >= self.horizon:
+            return True
+        if lag <= 0:
+            return False
+        return max(self.times.get(key, float("-inf")), self.all_at) > started - lag
+
+
+class ContactCache:
+    """
+    Кеш відповідей на читання контактів у Redis: один hash на користувача
+    (поле - форма запиту, значення - JSON), TTL на весь hash і ліміт кількості полів.
+    Будь-який запис контактів користувача видаляє його hash цілком і збільшує
+    версію користувача: завантаження, що почалося до запису, не потрапить у кеш.
+    Прочитане з репліки кешується, лише якщо вона вже мала застосувати останній запис.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, max_bytes: int):
+        self.redis: Optional[Redis] = None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.changes = RecentChanges()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_skips = 0
+
+    def init(self, redis: Redis) -> None:
+        self.redis = redis
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"contacts:{user_id}"
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"contacts_version:{user_id}"
+
+    async def get(self, user_id: int, shape: str) -> Optional[Any]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.hget(self.key(user_id), shape)
+        except RedisError as err:
+            self.errors += 1
+            logger.warning(f"Contact cache read failed: {err}")
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, user_id: int, shape: str, value: Any, version: Optional[Any] = None) -> None:
+        if self.redis is None:
+            return
+        raw = json.dumps(value, separators=(",", ":"))
+        if len(raw) > self.max_bytes:
+            return
+        key, version_key = self.key(user_id), self.version_key(user_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                # version - значення version_key до завантаження; якщо з того часу був
+                # invalidate (або він стався до EXEC - WATCH), значення вже застаріле
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) != version:
+                    return
+                pipe.multi()
+                _, entries, ttl = await pipe.hset(key, shape, raw).hlen(key).ttl(key).execute()
+            if entries > self.max_entries:
+                # забагато різних запитів одного користувача - починаємо з нуля
+                await self.redis.delete(key)
+            elif ttl < 0:
+                # TTL ставиться один раз, коли hash створено: запис живе не довше ttl
+                await self.redis.expire(key, self.ttl)
+        except WatchError:
+            return
+        except RedisError as err:
+            self.errors += 1
+            logger.warning(f"Contact cache write failed: {err}")
+
+    async def invalidate(self, user_id: Optional[int]) -> None:
+        if self.redis is None or user_id is None:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.incr(self.version_key(user_id)).delete(self.key(user_id)).execute()
+        except RedisError as err:
+            self.errors += 1
+            logger.warning(f"Contact cache invalidation failed: {err}")
+
+    def changed(self, user_id: Optional[str]) -> None:
+        # обробник шини інвалідації (CONTACTS): сам hash уже видалив воркер, що писав
+        self.changes.mark(user_id)
+
+    async def get_or_load(self, user_id: int, shape: str, load: Callable[[], Awaitable[Any]],
+                          staleness: Optional[Callable[[], Optional[float]]] = None) -> Any:
+        """
+        The get_or_load function returns the cached value of the query shape,
+        or calls load, caches its JSON-ready result and returns it.
+        A value read from a replica that may not have the last write of the user yet
+        is returned but not cached.
+
+        :param user_id: int: Owner of the contacts
+        :param shape: str: Query name and parameters, e.g. "page:id:100:"
+        :param load: Callable[[], Awaitable[Any]]: Reads the value from the database
+        :param staleness: Optional[Callable[[], Optional[float]]]: After load, how many seconds
+            the data read may lag behind the primary (None - unknown); no callable - primary
+        :return: The cached or freshly loaded value
+        """
+        value = await self.get(user_id, shape)
+        if value is not None:
+            return value
+        if self.redis is None:
+            return await load()
+        try:
+            version = await self.redis.get(self.version_key(user_id))
+        except RedisError as err:
+            self.errors += 1
+            logger.warning(f"Contact cache read failed: {err}")
+            return await load()
+        started = time.monotonic()
+        value = await load()
+        if staleness is not None and self.changes.may_be_stale(str(user_id), started, staleness()):
+            self.stale_skips += 1
+            return value
+        await self.set(user_id, shape, value, version)
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.redis is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "stale_skips": self.stale_skips,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+# лише те, що потрібно get_current_user і маршрутам (UserDb); хеш пароля і refresh_token
+# не кешуються - у спільному Redis їх прочитав би будь-хто з доступом до нього.
+# Доступ до них у закешованого User дає DetachedInstanceError, а не None
+USER_CACHE_COLUMNS = ("id", "email", "username", "avatar", "confirmed", "created_at")
+
+
+class UserCache:
+    """
+    Кеш користувачів для get_current_user: LRU з TTL у пам'яті воркера
+    і (за бажання) другий рівень у Redis. Зберігаються значення USER_CACHE_COLUMNS,
+    на кожен запит будується окремий detached User.
+    """
+
+    def __init__(self, max_size: int, ttl: float, use_redis: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.redis: Optional[Redis] = None
+        self.entries: OrderedDict = OrderedDict()     # email -> (expires_at, columns)
+        # зростає з кожним evict: завантаження, що перетнулося з evict, не кешується
+        self.generation = 0
+        self.changes = RecentChanges()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stale_skips = 0
+
+    def init(self, redis: Redis) -> None:
+        if self.use_redis:
+            self.redis = redis
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"user:{email}"
+
+    @staticmethod
+    def dump(user: User) -> dict:
+        return {key: getattr(user, key) for key in USER_CACHE_COLUMNS}
+
+    @staticmethod
+    def load(columns: dict) -> User:
+        user = User(**columns)
+        # має identity, але не прив'язаний до сесії: db.add/merge не зробить INSERT
+        make_transient_to_detached(user)
+        return user
+
+    def get_local(self, email: str) -> Optional[dict]:
+        entry = self.entries.get(email)
+        if entry is None:
+            return None
+        expires_at, columns = entry
+        if expires_at < time.monotonic():
+            del self.entries[email]
+            return None
+        self.entries.move_to_end(email)
+        return columns
+
+    def set_local(self, email: str, columns: dict) -> None:
+        self.entries[email] = (time.monotonic() + self.ttl, columns)
+        self.entries.move_to_end(email)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def evict(self, email: Optional[str]) -> None:
+        # обробник шини інвалідації: None - очистити все
+        self.generation += 1
+        self.changes.mark(email)
+        if email is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(email, None)
+
+    async def get_redis(self, email: str) -> Optional[dict]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self.key(email))
+        except RedisError as err:
+            logger.warning(f"User cache read failed: {err}")
+            return None
+        if raw is None:
+            return None
+        # записи попередніх версій могли містити й інші колонки
+        columns = {key: value for key, value in json.loads(raw).items() if key in USER_CACHE_COLUMNS}
+        for attr in inspect(User).column_attrs:
+            if isinstance(attr.columns[0].type, DateTime) and columns.get(attr.key):
+                columns[attr.key] = datetime.fromisoformat(columns[attr.key])
+        return columns
+
+    async def set_redis(self, email: str, columns: dict) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(self.key(email), json.dumps(columns, default=str), ex=int(self.ttl))
+        except RedisError as err:
+            logger.warning(f"User cache write failed: {err}")
+
+    async def invalidate_shared(self, email: str) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self.key(email))
+        except RedisError as err:
+            logger.warning(f"User cache invalidation failed: {err}")
+
+    async def get_or_load(self, email: str, load: Callable[[], Awaitable[Optional[User]]],
+                          staleness: Optional[Callable[[], Optional[float]]] = None) -> Optional[User]:
+        """
+        The get_or_load function returns the user by email from the local cache,
+        then from Redis, and only then calls load (the database).
+        A user read from a replica that may not have the last change yet is not cached.
+
+        :param email: str: Subject of the access token
+        :param load: Callable[[], Awaitable[Optional[User]]]: Reads the user from the database
+        :param staleness: Optional[Callable[[], Optional[float]]]: After load, how many seconds
+            the data read may lag behind the primary (None - unknown); no callable - primary
+        :return: A detached User or None
+        """
+        columns = self.get_local(email)
+        if columns is not None:
+            self.hits += 1
+            return self.load(columns)
+
+        generation = self.generation
+        columns = await self.get_redis(email)
+        if columns is not None:
+            self.redis_hits += 1
+        else:
+            self.misses += 1
+            started = time.monotonic()
+            user = await load()
+            if user is None:
+                return None
+            columns = self.dump(user)
+            if staleness is not None and self.changes.may_be_stale(email, started, staleness()):
+                self.stale_skips += 1
+                return self.load(columns)
+            if generation == self.generation:
+                await self.set_redis(email, columns)
+        if generation == self.generation:
+            self.set_local(email, columns)
+        return self.load(columns)
+
+    def stats(self) -> dict:
+        total = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "stale_skips": self.stale_skips,
+            "hit_rate": round((self.hits + self.redis_hits) / total, 3) if total else None,
+        }
+
+
+contact_cache = ContactCache(settings.contact_cache_ttl, settings.contact_cache_max_entries,
+                             settings.contact_cache_max_bytes)
+user_cache = UserCache(settings.user_cache_size, settings.user_cache_ttl, settings.user_cache_redis)
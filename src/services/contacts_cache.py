@@ -0,0 +1,100 @@
+# src\services\contacts_cache.py
+import json
+from datetime import date
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Contact, User
+from src.database.replicas import read_staleness
+from src.repository import contacts as repository_contacts
+from src.schemas import ContactResponse, contact_response_model
+from src.services.cache import contact_cache
+from src.services.metrics import phase
+
+
+# валідатор і серіалізатор списку збираються один раз (pydantic-core), а не на кожен контакт
+contact_list = TypeAdapter(List[ContactResponse])
+CONTACT_FIELDS = tuple(ContactResponse.model_fields)
+
+
+@lru_cache(maxsize=None)
+def contact_list_adapter(fields: Optional[Tuple[str, ...]]) -> TypeAdapter:
+    # fields= : свій адаптер на кожен набір полів (наборів не більше 2**len(CONTACT_FIELDS))
+    if fields is None:
+        return contact_list
+    return TypeAdapter(List[contact_response_model(fields)])
+
+
+def as_attributes(contacts: List[Contact | Row]) -> list:
+    # Core-рядки (режим read_only у репозиторії) pydantic читає через getattr утричі
+    # повільніше, ніж dict, тож рядки спершу стають dict (ключі спільні для всього результату)
+    if not contacts or not isinstance(contacts[0], Row):
+        return contacts
+    keys = contacts[0]._fields
+    return [dict(zip(keys, row)) for row in contacts]
+
+
+# читання контактів через кеш (src/services/cache.py); значення - вже серіалізовані ContactResponse
+def dump_contacts(contacts: List[Contact | Row], fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    adapter = contact_list_adapter(fields)
+    with phase("serialize"):
+        return adapter.dump_python(adapter.validate_python(as_attributes(contacts), from_attributes=True), mode="json")
+
+
+def contacts_json(contacts: List[Contact | Row], fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    # одразу тіло відповіді, без проміжних dict
+    adapter = contact_list_adapter(fields)
+    with phase("serialize"):
+        return adapter.dump_json(adapter.validate_python(as_attributes(contacts), from_attributes=True))
+
+
+def select_fields(contacts: List[dict], fields: Optional[Sequence[str]]) -> List[dict]:
+    # звуження вже серіалізованих (закешованих повністю) контактів
+    if fields is None:
+        return contacts
+    return [{name: contact[name] for name in fields} for contact in contacts]
+
+
+# промах кешу читається з репліки; read_staleness каже кешу, чи могла вона ще не бачити
+# останнього запису (тоді результат повертається, але не кешується)
+async def get_contact(contact_id: int, user: User, db: AsyncSession) -> Optional[dict]:
+    async def load():
+        contact = await repository_contacts.get_contact(contact_id, user, db, read_only=True)
+        # відсутній контакт теж кешується (як {}), щоб не питати БД про нього щоразу
+        return dump_contacts([contact])[0] if contact is not None else {}
+
+    return await contact_cache.get_or_load(user.id, f"contact:{contact_id}", load,
+                                           lambda: read_staleness(db)) or None
+
+
+async def get_contacts_page(user: User, db: AsyncSession, limit: int, order: str,
+                            after: Optional[tuple],
+                            fields: Optional[Tuple[str, ...]] = None) -> Tuple[List[dict], Optional[tuple]]:
+    async def load():
+        contacts, next_key = await repository_contacts.get_contacts_page(user, db, limit, order, after, fields,
+                                                                       read_only=True)
+        return {"contacts": dump_contacts(contacts, fields), "next": next_key}
+
+    shape = f"page:{order}:{limit}:{json.dumps(after)}" + (f":{','.join(fields)}" if fields else "")
+    page = await contact_cache.get_or_load(user.id, shape, load, lambda: read_staleness(db))
+    return page["contacts"], tuple(page["next"]) if page["next"] is not None else None
+
+
+async def get_week_birthdays(user: User, db: AsyncSession) -> List[dict]:
+    async def load():
+        return dump_contacts(await repository_contacts.get_week_birthdays(user, db, read_only=True))
+
+    # результат залежить від поточної дати
+    return await contact_cache.get_or_load(user.id, f"week:{date.today()}", load, lambda: read_staleness(db))
+
+
+async def get_upcoming_birthdays(user: User, db: AsyncSession, start: date, days: int) -> List[dict]:
+    async def load():
+        return dump_contacts(await repository_contacts.get_upcoming_birthdays(user, db, start, days, read_only=True))
+
+    return await contact_cache.get_or_load(user.id, f"upcoming:{start}:{days}", load,
+                                           lambda: read_staleness(db))
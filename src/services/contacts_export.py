@@ -0,0 +1,75 @@
+# src\services\contacts_export.py
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import Row
+
+from src.database.conn_db import SessionLocal
+from src.database.models import User
+from src.repository import contacts as repository_contacts
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def json_default(value):
+    # date/datetime - у форматі ISO 8601
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_chunk(rows: Sequence[Row]) -> bytes:
+    return "".join(json.dumps(row._asdict(), default=json_default, ensure_ascii=False) + "\n"
+                   for row in rows).encode("utf-8")
+
+
+def csv_chunk(rows: Sequence[Row], header: bool = False,
+              columns: Sequence[str] = repository_contacts.EXPORT_COLUMNS) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_contacts(user: User, file_format: str, compress: bool = False,
+                          columns: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+    """
+    The export_contacts function streams all contacts of the user, ordered by id,
+    as NDJSON or CSV. Rows are read from a server-side cursor batch by batch,
+    so memory use does not depend on the size of the address book.
+
+    :param user: User: Owner of the contacts
+    :param file_format: str: "ndjson" or "csv"
+    :param compress: bool: Gzip the output on the fly
+    :param columns: Optional[Sequence[str]]: Exported columns, all of EXPORT_COLUMNS if None
+    :return: An async iterator of encoded chunks
+    """
+    columns = columns or repository_contacts.EXPORT_COLUMNS
+    gzip = zlib.compressobj(wbits=31) if compress else None   # 31 - gzip-заголовок
+
+    def encode(chunk: bytes) -> bytes:
+        return gzip.compress(chunk) if gzip else chunk
+
+    if file_format == "csv":
+        yield encode(csv_chunk([], header=True, columns=columns))
+
+    # окрема сесія: відповідь стрімиться вже після виходу з обробника маршруту
+    async with SessionLocal() as db:
+        async for rows in repository_contacts.stream_contacts(user, db, EXPORT_BATCH_SIZE, columns):
+            chunk = encode(csv_chunk(rows) if file_format == "csv" else ndjson_chunk(rows))
+            if chunk:
+                yield chunk
+
+    if gzip:
+        yield gzip.flush()
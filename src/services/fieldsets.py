@@ -0,0 +1,28 @@
+# src\services\fieldsets.py
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], required: Sequence[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    The parse_fields function turns the fields= query parameter (comma separated
+    column names, e.g. "name,lastname") into a tuple of columns.
+    Columns keep the order of allowed, so the same set always gives the same tuple.
+
+    :param fields: Optional[str]: Value of the fields= query parameter
+    :param allowed: Sequence[str]: Columns the endpoint can return
+    :param required: Sequence[str]: Columns returned even if not asked for (e.g. id)
+    :return: The requested columns or None when all columns are returned
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    unknown = names.difference(allowed)
+    if not names or unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "Empty fields")
+    names.update(required)
+    if names.issuperset(allowed):
+        return None
+    return tuple(name for name in allowed if name in names)
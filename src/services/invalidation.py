@@ -0,0 +1,145 @@
+# src\services\invalidation.py
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.services.cache import contact_cache, user_cache
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "invalidate"
+# теми повідомлень: ключ - user_id (контакти) або email (користувач)
+CONTACTS = "contacts"
+USER = "user"
+
+# обробник отримує ключ запису; None - скинути все (після розриву зв'язку з Redis)
+Handler = Callable[[Optional[str]], None]
+
+
+class InvalidationBus:
+    """
+    Шина змін через Redis pub/sub: воркер, що записав дані, публікує (тема, ключ),
+    а всі воркери на всіх хостах викидають відповідні записи з локальних кешів.
+    """
+
+    def __init__(self, channel: str = CHANNEL, reconnect_delay: float = 1.0):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.node = uuid.uuid4().hex
+        self.redis: Optional[Redis] = None
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.received = 0
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self.handlers[topic].append(handler)
+
+    def dispatch(self, topic: str, key: Optional[str]) -> None:
+        for handler in self.handlers.get(topic, []):
+            try:
+                handler(key)
+            except Exception as err:
+                logger.error(f"Invalidation handler for {topic} failed: {err}")
+
+    def reset(self) -> None:
+        for topic in list(self.handlers):
+            self.dispatch(topic, None)
+
+    async def publish(self, topic: str, key) -> None:
+        """
+        The publish function evicts the key from the local caches at once
+        and tells the other workers to do the same.
+
+        :param topic: str: CONTACTS or USER
+        :param key: Key of the changed record (user id or email)
+        :return: None
+        """
+        key = str(key)
+        self.dispatch(topic, key)
+        if self.redis is None:
+            return
+        message = json.dumps({"node": self.node, "topic": topic, "key": key})
+        try:
+            await self.redis.publish(self.channel, message)
+            self.published += 1
+        except RedisError as err:
+            logger.warning(f"Invalidation publish failed: {err}")
+
+    def handle_message(self, data: str) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("node") == self.node:
+            # свої зміни вже застосовані в publish
+            return
+        self.received += 1
+        self.dispatch(message.get("topic"), message.get("key"))
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.connected = True
+                    # поки підписки не було, повідомлення могли загубитися
+                    self.reset()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle_message(message["data"])
+            except (RedisError, OSError) as err:
+                logger.warning(f"Invalidation bus disconnected: {err}")
+            self.connected = False
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self, redis: Redis) -> None:
+        self.redis = redis
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+        self.redis = None
+
+    def stats(self) -> dict:
+        return {
+            "node": self.node,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+invalidation_bus = InvalidationBus()
+invalidation_bus.subscribe(USER, user_cache.evict)
+invalidation_bus.subscribe(CONTACTS, contact_cache.changed)
+
+
+async def contacts_changed(user_id: Optional[int]) -> None:
+    # спільний кеш у Redis видаляється тут; повідомлення шини каже всім воркерам,
+    # коли був запис (ContactCache.changed) - щоб не кешувати прочитане з репліки, що відстає
+    if user_id is None:
+        return
+    await contact_cache.invalidate(user_id)
+    await invalidation_bus.publish(CONTACTS, user_id)
+
+
+async def user_changed(email: str) -> None:
+    await user_cache.invalidate_shared(email)
+    await invalidation_bus.publish(USER, email)
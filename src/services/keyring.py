@@ -0,0 +1,221 @@
+# src\services\keyring.py
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import JWTError, jwk, jwt
+
+
+logger = logging.getLogger(__name__)
+
+# python-jose 3.3 не підтримує EdDSA, тому асиметричні ключі - RS256 або ES256
+KEY_ALGORITHMS = ("RS256", "ES256")
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Unsupported key algorithm {algorithm}, expected one of {KEY_ALGORITHMS}")
+
+
+def key_algorithm(private_key) -> str:
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return "RS256"
+    if isinstance(private_key, ec.EllipticCurvePrivateKey) and isinstance(private_key.curve, ec.SECP256R1):
+        return "ES256"
+    raise ValueError("Unsupported private key type")
+
+
+class SigningKey:
+    """
+    Один ключ зв'язки: kid, алгоритм, приватний ключ для підпису
+    і публічний для перевірки (об'єкти jose будуються один раз).
+    """
+
+    def __init__(self, kid: str, private_pem: bytes, created: float):
+        private_key = serialization.load_pem_private_key(private_pem, password=None)
+        self.kid = kid
+        self.created = created
+        self.algorithm = key_algorithm(private_key)
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self.private_key = jwk.construct(private_pem, self.algorithm)
+        self.public_key = jwk.construct(public_pem, self.algorithm)
+
+    def jwk(self) -> dict:
+        return dict(self.public_key.to_dict(), kid=self.kid, use="sig")
+
+
+class KeyRing:
+    """
+    Зв'язка ключів для JWT: кожен файл {kid}.pem у keys_dir - приватний ключ.
+    Підписує найновіший ключ, старший за activate_after секунд (щоб інші вузли
+    встигли забрати його з JWKS), перевіряються всі ключі зв'язки за kid із заголовка.
+    Токени без kid (HS256) перевіряються секретом, поки в зв'язці немає ключів;
+    після переходу - лише до legacy_until, але не довше за legacy_max_age
+    (найдовший строк життя токена) від появи найстарішого ключа.
+    """
+
+    def __init__(self, keys_dir: str = "", algorithm: str = "RS256", max_keys: int = 3,
+                 activate_after: float = 300, reload_interval: float = 60,
+                 secret_key: Optional[str] = None, secret_algorithm: str = "HS256",
+                 legacy_until: float = 0, legacy_max_age: float = 0):
+        self.keys_dir = keys_dir
+        self.algorithm = algorithm
+        self.max_keys = max_keys
+        self.activate_after = activate_after
+        self.reload_interval = reload_interval
+        self.secret_key = secret_key
+        self.secret_algorithm = secret_algorithm
+        self.legacy_until = legacy_until
+        self.legacy_max_age = legacy_max_age
+        self.keys: Dict[str, SigningKey] = {}
+        self.loaded_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.keys_dir)
+
+    def path(self, kid: str) -> str:
+        return os.path.join(self.keys_dir, f"{kid}.pem")
+
+    def load(self) -> None:
+        """
+        The load function rereads keys_dir: new key files are parsed, removed ones are dropped.
+        Workers call it periodically, so a rotation done by one process reaches all of them.
+
+        :return: None
+        """
+        self.loaded_at = time.monotonic()
+        if not self.enabled or not os.path.isdir(self.keys_dir):
+            return
+        keys = {}
+        for name in os.listdir(self.keys_dir):
+            if not name.endswith(".pem"):
+                continue
+            kid = name[:-4]
+            if kid in self.keys:
+                keys[kid] = self.keys[kid]
+                continue
+            try:
+                with open(self.path(kid), "rb") as file:
+                    keys[kid] = SigningKey(kid, file.read(), os.path.getmtime(self.path(kid)))
+            except (OSError, ValueError) as err:
+                logger.error(f"JWT key {name} skipped: {err}")
+        self.keys = keys
+        if keys:
+            # межа лише зменшується: ретирування старого ключа її не відсуває
+            oldest = min(key.created for key in keys.values())
+            self.legacy_until = min(self.legacy_until, oldest + self.legacy_max_age)
+
+    def maybe_reload(self) -> None:
+        if self.enabled and time.monotonic() - self.loaded_at > self.reload_interval:
+            self.load()
+
+    def ordered(self) -> List[SigningKey]:
+        # від найновішого до найстарішого
+        return sorted(self.keys.values(), key=lambda key: (key.created, key.kid), reverse=True)
+
+    @property
+    def active(self) -> Optional[SigningKey]:
+        self.maybe_reload()
+        keys = self.ordered()
+        now = time.time()
+        for key in keys:
+            if now - key.created >= self.activate_after:
+                return key
+        # перший ключ зв'язки активний одразу
+        return keys[-1] if keys else None
+
+    def generate(self) -> SigningKey:
+        private_key = generate_private_key(self.algorithm)
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        kid = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.keys_dir, exist_ok=True)
+        # приватний ключ читає лише власник
+        fd = os.open(self.path(kid), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as file:
+            file.write(private_pem)
+        key = SigningKey(kid, private_pem, os.path.getmtime(self.path(kid)))
+        self.keys[kid] = key
+        self.legacy_until = min(self.legacy_until, key.created + self.legacy_max_age)
+        return key
+
+    def rotate(self) -> SigningKey:
+        """
+        The rotate function adds a new key to the ring and removes the oldest ones beyond max_keys.
+        Tokens signed with a removed key stop verifying, so rotate no more often than
+        the token lifetime divided by max_keys - 1.
+
+        :return: The new key
+        """
+        self.load()
+        key = self.generate()
+        for old in self.ordered()[self.max_keys:]:
+            os.remove(self.path(old.kid))
+            del self.keys[old.kid]
+            logger.info(f"JWT key {old.kid} retired")
+        return key
+
+    def encode(self, claims: dict) -> str:
+        key = self.active if self.enabled else None
+        if key is None:
+            if not self.secret_key:
+                raise JWTError("No signing key configured")
+            return jwt.encode(claims, self.secret_key, algorithm=self.secret_algorithm)
+        return jwt.encode(claims, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def legacy_accepted(self) -> bool:
+        return bool(self.secret_key) and not (self.keys and time.time() >= self.legacy_until)
+
+    def accepts(self, kid: Optional[str]) -> bool:
+        """
+        The accepts function tells whether a token verified earlier (e.g. kept in a cache)
+        would still verify: its key is still in the ring, or for a token without kid,
+        the shared secret is still accepted.
+
+        :param kid: Optional[str]: Key id from the token header
+        :return: True if the token's key is still accepted
+        """
+        self.maybe_reload()
+        if kid is None:
+            return self.legacy_accepted()
+        return kid in self.keys
+
+    def decode(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if not self.legacy_accepted():
+                raise JWTError("Token has no key id")
+            return jwt.decode(token, self.secret_key, algorithms=[self.secret_algorithm])
+        key = self.keys.get(kid)
+        if key is None and self.enabled:
+            # ключ міг з'явитися після ротації в іншому процесі; каталог перечитується
+            # не частіше за reload_interval (новий ключ підписує лише через activate_after),
+            # щоб токени з вигаданим kid не змушували читати диск на кожен запит
+            self.maybe_reload()
+            key = self.keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id {kid}")
+        # алгоритм береться з ключа, а не з заголовка токена
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        The jwks function returns the public keys of the ring as a JWK Set (RFC 7517),
+        including keys that are not active yet or no longer sign but still verify.
+
+        :return: A dict with the keys list
+        """
+        self.maybe_reload()
+        return {"keys": [key.jwk() for key in self.ordered()]}
@@ -0,0 +1,217 @@
+# src\services\metrics.py
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# метод запиту - мітка метрик: довільний рядок від клієнта створював би нові серії
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"))
+
+
+class RequestTiming:
+    """
+    Фази одного запиту: назва -> (сума наносекунд, кількість).
+    Живе в contextvar, тож його бачать і залежності, і SQL-події SQLAlchemy (greenlet
+    успадковує контекст задачі).
+    """
+
+    __slots__ = ("started", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.phases: Dict[str, List[int]] = {}
+
+    def add(self, name: str, duration_ns: int) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [duration_ns, 1]
+        else:
+            phase[0] += duration_ns
+            phase[1] += 1
+
+    def server_timing(self, total_ns: int) -> str:
+        # https://www.w3.org/TR/server-timing/ - тривалість у мілісекундах
+        parts = []
+        for name, (duration_ns, count) in self.phases.items():
+            entry = f"{name};dur={duration_ns / 1e6:.3f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            parts.append(entry)
+        parts.append(f"total;dur={total_ns / 1e6:.3f}")
+        return ", ".join(parts)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    The phase function measures a block of code as a named phase of the current request.
+    Outside a request it only runs the block.
+
+    :param name: str: Phase name in Server-Timing and /metrics
+    :return: A context manager
+    """
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter_ns() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    # кожен SQL-запит - фаза db; лічильник запитів = кількість фази
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter_ns()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timing = current_timing.get()
+        started = getattr(context, "_query_started", None)
+        if timing is not None and started is not None:
+            timing.add("db", time.perf_counter_ns() - started)
+
+
+class TimedJSONResponse(ORJSONResponse):
+    # серіалізація тіла відповіді (orjson) - окрема фаза render;
+    # вже готовий JSON (TypeAdapter.dump_json) віддається як є
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        with phase("render"):
+            return super().render(content)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, index: int, value: float) -> None:
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Агрегати по маршрутах у цьому воркері: гістограма тривалості запитів,
+    сумарний час фаз і кількість SQL-запитів. /metrics віддає їх у текстовому
+    форматі Prometheus (кожен воркер - свої лічильники, як у prometheus_client без multiprocess).
+    """
+
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self.phase_seconds: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self.queries: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, timing: RequestTiming) -> None:
+        key = (method, route, str(status))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram(len(self.buckets) + 1)
+        histogram.observe(bisect_left(self.buckets, seconds), seconds)
+        for name, (duration_ns, count) in timing.phases.items():
+            self.phase_seconds[(method, route, name)] += duration_ns / 1e9
+            if name == "db":
+                self.queries[(method, route)] += count
+
+    @staticmethod
+    def labels(**values) -> str:
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values.values())
+        return "{" + ",".join(f'{k}="{v}"' for k, v in zip(values, escaped)) + "}"
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.requests.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"http_request_duration_seconds_bucket"
+                             f"{self.labels(method=method, route=route, status=status, le=le)} {cumulative}")
+            route_labels = self.labels(method=method, route=route, status=status)
+            lines.append(f"http_request_duration_seconds_sum{route_labels} {histogram.total}")
+            lines.append(f"http_request_duration_seconds_count{route_labels} {histogram.count}")
+
+        lines += [
+            "# HELP http_request_phase_seconds_total Time spent in request phases by route",
+            "# TYPE http_request_phase_seconds_total counter",
+        ]
+        for (method, route, name), seconds in sorted(self.phase_seconds.items()):
+            lines.append(f"http_request_phase_seconds_total{self.labels(method=method, route=route, phase=name)} {seconds}")
+
+        lines += [
+            "# HELP http_request_db_queries_total SQL statements executed by route",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route), count in sorted(self.queries.items()):
+            lines.append(f"http_request_db_queries_total{self.labels(method=method, route=route)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class ServerTimingMiddleware:
+    """
+    Чистий ASGI-middleware (без BaseHTTPMiddleware: ні окремої задачі, ні обгортки
+    потоку тіла, стрімінг відповідей не ламається). Ставить RequestTiming у contextvar,
+    додає Server-Timing до заголовків відповіді і після відправки тіла
+    записує запит в агрегати /metrics.
+    """
+
+    def __init__(self, app: ASGIApp, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.server_timing(time.perf_counter_ns() - timing.started))
+            await send(message)
+
+        token = current_timing.set(timing)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            # шаблон маршруту, а не шлях: /api/contacts/{contact_id}, а не кожен id окремо
+            route = scope.get("route")
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            self.registry.observe(method, route.path if route else "unmatched", status_code,
+                                  (time.perf_counter_ns() - timing.started) / 1e9, timing)
@@ -0,0 +1,54 @@
+# src\services\pagination.py
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# з яких значень складається ключ сортування для кожного порядку
+CURSOR_KEYS = {
+    "id": (int,),
+    "name": ((str, type(None)), int),
+}
+
+
+def encode_cursor(order: str, key: tuple) -> str:
+    """
+    The encode_cursor function packs the sort key of the last returned row
+    into an opaque url-safe string.
+
+    :param order: str: Sort order the key belongs to ("id" or "name")
+    :param key: tuple: Sort key of the last row, e.g. (id,) or (name, id)
+    :return: An opaque cursor string
+    """
+    raw = json.dumps({"o": order, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], order: str) -> Optional[tuple]:
+    """
+    The decode_cursor function unpacks a cursor made by encode_cursor.
+
+    :param cursor: Optional[str]: Cursor from the query string
+    :param order: str: Sort order requested by the client, must match the cursor
+    :return: The sort key tuple or None when no cursor is given
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = tuple(data["k"])
+        cursor_order = data["o"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_order != order:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match order")
+    types = CURSOR_KEYS[order]
+    if len(key) != len(types) or not all(isinstance(v, t) for v, t in zip(key, types)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return key
@@ -0,0 +1,211 @@
+# src\services\rate_limit.py
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.services.auth import auth_service
+from src.services.metrics import phase
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Відро токенів одного клієнта в цьому воркері: capacity запитів поспіль,
+    далі rate запитів за секунду. pending - скільки запитів ще не звітовано в Redis.
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "blocked_until", "pending", "touched")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+        self.pending = 0
+        self.touched = False
+
+    def take(self, now: float) -> float:
+        """
+        The take function spends one token.
+
+        :param now: float: Current monotonic time
+        :return: 0 if the request is allowed, otherwise seconds until it would be
+        """
+        self.touched = True
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.pending += 1
+        return 0.0
+
+
+class RateLimit:
+    """
+    Залежність FastAPI: times запитів за seconds на клієнта (користувач з токена або IP)
+    і маршрут.
+    Рішення приймається локально, без звернення до Redis.
+    """
+
+    def __init__(self, limiter: "Limiter", name: str, times: int, seconds: float):
+        self.limiter = limiter
+        self.name = name
+        self.times = times
+        self.seconds = seconds
+        self.buckets: OrderedDict = OrderedDict()
+
+    def bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.times, self.times / self.seconds, now)
+            if len(self.buckets) > self.limiter.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    async def __call__(self, request: Request):
+        with phase("ratelimit"):
+            now = time.monotonic()
+            retry_after = self.bucket(self.limiter.identifier(request), now).take(now)
+        if retry_after:
+            self.limiter.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+class Limiter:
+    """
+    Дворівневий обмежувач: відра токенів у пам'яті воркера і фоновий звірник,
+    який раз на sync_interval додає витрачене в лічильники Redis (фіксоване вікно
+    seconds) і, якщо всі воркери разом вичерпали ліміт, блокує відро до кінця вікна.
+    Глобальний ліміт наближений: перевищення - не більше того, що воркери
+    встигають пропустити за один sync_interval.
+    """
+
+    prefix = "ratelimit"
+
+    def __init__(self, sync_interval: float = 1.0, max_keys: int = 100000):
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self.redis: Optional[Redis] = None
+        self.limits: Dict[str, RateLimit] = {}
+        self.rejected = 0
+        self.syncs = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def limit(self, name: str, times: int, seconds: float) -> RateLimit:
+        limit = self.limits[name] = RateLimit(self, name, times, seconds)
+        return limit
+
+    def client(self, request: Request) -> str:
+        # користувач - з access-токена (перевірені токени кешуються в Auth), інакше IP
+        authorization = request.headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            try:
+                payload = auth_service.decode_access_token(authorization[7:])
+                if payload.get("scope") == "access_token" and payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            except JWTError:
+                pass
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    def identifier(self, request: Request) -> str:
+        # як і у fastapi-limiter, ліміт окремий для кожного маршруту
+        endpoint = request.scope.get("endpoint")
+        return f"{self.client(request)}:{getattr(endpoint, '__name__', request.scope['path'])}"
+
+    async def sync(self) -> None:
+        """
+        The sync function reports the requests allowed since the last sync to Redis
+        and applies the global counts of the current window to the local buckets.
+
+        :return: None
+        """
+        if self.redis is None:
+            return
+        now = time.time()
+        batch: List[tuple] = []
+        for limit in self.limits.values():
+            window = int(now // limit.seconds)
+            for key, bucket in list(limit.buckets.items()):
+                if bucket.touched:
+                    batch.append((limit, window, bucket, bucket.pending, f"{self.prefix}:{limit.name}:{key}:{window}"))
+                    bucket.touched = False
+        if not batch:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for limit, _, _, pending, redis_key in batch:
+                    pipe.incrby(redis_key, pending)
+                    pipe.expire(redis_key, math.ceil(limit.seconds) + 1)
+                results = await pipe.execute()
+        except RedisError as err:
+            self.errors += 1
+            logger.warning(f"Rate limit sync failed: {err}")
+            return
+        self.syncs += 1
+        monotonic = time.monotonic()
+        for (limit, window, bucket, pending, _), used in zip(batch, results[::2]):
+            bucket.pending -= pending
+            remaining = limit.times - int(used)
+            if remaining <= 0:
+                # ліміт вичерпано разом з іншими воркерами - чекаємо нового вікна
+                bucket.tokens = 0
+                bucket.blocked_until = monotonic + (window + 1) * limit.seconds - now
+            else:
+                bucket.tokens = min(bucket.tokens, remaining)
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    def start(self, redis: Redis) -> None:
+        self.redis = redis
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync()
+        self.redis = None
+
+    def stats(self) -> dict:
+        return {
+            "clients": {name: len(limit.buckets) for name, limit in self.limits.items()},
+            "rejected": self.rejected,
+            "syncs": self.syncs,
+            "errors": self.errors,
+        }
+
+
+limiter = Limiter(sync_interval=settings.rate_limit_sync_interval, max_keys=settings.rate_limit_max_keys)
@@ -0,0 +1,161 @@
+# src\services\refresh_tokens.py
+import logging
+import uuid
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+# той самий термін, що й exp у Auth.create_refresh_token
+REFRESH_TOKEN_TTL = timedelta(days=7)
+
+# результат ротації
+ROTATED = 1
+UNKNOWN = 0     # сім'ї немає: вийшов TTL, вихід із системи або вже відкликана
+REUSED = -1     # пред'явлено вже замінений токен - сім'ю відкликано
+
+# перевірка і заміна поточного jti атомарно, щоб два паралельні refresh не пройшли обидва;
+# KEYS: сім'я, множина сімей користувача; ARGV: пред'явлений jti, новий jti, TTL, id сім'ї.
+# Сім'я, якої вже немає або яку відкликано, прибирається і з множини користувача
+ROTATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'jti')
+if not current then
+    redis.call('SREM', KEYS[2], ARGV[4])
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[4])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+
+def unavailable(err: RedisError) -> HTTPException:
+    # без сховища не можна ні видати, ні перевірити refresh-токен
+    logger.error(f"Refresh token store failed: {err}")
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Token store unavailable")
+
+
+class RefreshTokenStore:
+    """
+    Стан refresh-токенів у Redis замість users.refresh_token.
+    Сім'я - ланцюжок токенів від одного логіну: hash refresh:family:{fam} з email
+    і jti поточного токена, TTL як у refresh-токена. Кожен refresh замінює jti;
+    повторне пред'явлення старого токена відкликає всю сім'ю.
+    Множина refresh:user:{email} тримає сім'ї користувача для revoke-all.
+    """
+
+    def __init__(self, ttl: timedelta = REFRESH_TOKEN_TTL):
+        self.redis: Optional[Redis] = None
+        self.ttl = int(ttl.total_seconds())
+        self.rotated = 0
+        self.reused = 0
+
+    def init(self, redis: Redis) -> None:
+        self.redis = redis
+
+    @staticmethod
+    def family_key(family: str) -> str:
+        return f"refresh:family:{family}"
+
+    @staticmethod
+    def user_key(email: str) -> str:
+        return f"refresh:user:{email}"
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def client(self) -> Redis:
+        if self.redis is None:
+            raise unavailable(RedisError("Redis is not initialized"))
+        return self.redis
+
+    async def start(self, email: str) -> Tuple[str, str]:
+        """
+        The start function opens a new token family on login.
+
+        :param email: str: Owner of the family
+        :return: Family id and jti of the first refresh token
+        """
+        redis = self.client()
+        family, jti = self.new_id(), self.new_id()
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(self.family_key(family), mapping={"email": email, "jti": jti})
+                pipe.expire(self.family_key(family), self.ttl)
+                pipe.sadd(self.user_key(email), family)
+                pipe.expire(self.user_key(email), self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            raise unavailable(err)
+        return family, jti
+
+    async def rotate(self, email: str, family: str, jti: str) -> str:
+        """
+        The rotate function swaps the presented refresh token for a new one in the same family.
+        A token that was already rotated is treated as stolen and its family is revoked.
+
+        :param email: str: Owner of the token
+        :param family: str: Family id from the token
+        :param jti: str: Token id from the token
+        :return: jti of the next refresh token
+        """
+        redis = self.client()
+        next_jti = self.new_id()
+        try:
+            result = await redis.eval(ROTATE_SCRIPT, 2, self.family_key(family), self.user_key(email),
+                                      jti, next_jti, self.ttl, family)
+        except RedisError as err:
+            raise unavailable(err)
+        if result == REUSED:
+            self.reused += 1
+            logger.warning(f"Refresh token reuse detected, family {family} revoked")
+        if result != ROTATED:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        self.rotated += 1
+        return next_jti
+
+    async def revoke(self, email: str, family: str) -> None:
+        redis = self.client()
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                await pipe.delete(self.family_key(family)).srem(self.user_key(email), family).execute()
+        except RedisError as err:
+            raise unavailable(err)
+
+    async def revoke_all(self, email: str) -> int:
+        """
+        The revoke_all function logs the user out of every device.
+
+        :param email: str: Owner of the families
+        :return: Number of revoked families
+        """
+        redis = self.client()
+        try:
+            families = await redis.smembers(self.user_key(email))
+            keys = [self.family_key(f.decode() if isinstance(f, bytes) else f) for f in families]
+            await redis.delete(self.user_key(email), *keys)
+        except RedisError as err:
+            raise unavailable(err)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.redis is not None,
+            "rotated": self.rotated,
+            "reused": self.reused,
+        }
+
+
+refresh_tokens = RefreshTokenStore()
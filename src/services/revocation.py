@@ -0,0 +1,232 @@
+# src\services\revocation.py
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.services.invalidation import invalidation_bus
+
+
+logger = logging.getLogger(__name__)
+
+# тема шини змін: ключ - jti відкликаного токена
+REVOKED = "revoked"
+
+
+class BloomFilter:
+    """
+    Фільтр Блума: "немає" - точно, "є" - можливо (ймовірність хибного збігу error_rate
+    при capacity елементах). Видаляти не вміє, тому список перебудовується з Redis.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item: str):
+        # подвійне хешування з вбудованого hash(): рядок кешує свій хеш, а фільтр
+        # живе лише в цьому процесі, тож рандомізація хешів між процесами не заважає
+        h = hash(item)
+        step = (h >> 32) | 1
+        position = h % self.size
+        for _ in range(self.hashes):
+            yield position
+            position = (position + step) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        # те саме, що positions, але без генератора: для відсутнього елемента
+        # зазвичай вистачає перших одного-двох бітів
+        bits, size = self.bits, self.size
+        h = hash(item)
+        step = (h >> 32) | 1
+        position = h % size
+        for _ in range(self.hashes):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position = (position + step) % size
+        return True
+
+
+class RevocationList:
+    """
+    Відкликані access-токени: sorted set у Redis (jti -> exp), з якого кожен воркер
+    будує свій фільтр Блума. Нові відкликання розходяться шиною змін одразу,
+    а періодична перебудова викидає токени, що вже прострочені, і надолужує пропущене.
+    Перевірка на запит - лише фільтр; Redis питаємо тільки при збігу.
+    """
+
+    key = "revoked"
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.redis: Optional[Redis] = None
+        self.bloom = BloomFilter(capacity, error_rate)
+        # без Redis - відкликання лише цього воркера
+        self.local = set()
+        self.checks = 0
+        self.positives = 0
+        self.false_positives = 0
+        self._task: Optional[asyncio.Task] = None
+        self._recent: Optional[list] = None
+        # перебудови не перетинаються (спільний _recent); позачергова - одна на раз
+        self._sync_lock = asyncio.Lock()
+        self._resync: Optional[asyncio.Task] = None
+        self._resync_again = False
+
+    def add_local(self, jti: Optional[str]) -> None:
+        if jti is None:
+            # зв'язок із шиною відновився - повідомлення могли загубитися
+            if self._task is not None:
+                self.request_sync()
+            return
+        if self.redis is None:
+            self.local.add(jti)
+        if self._recent is not None:
+            self._recent.append(jti)
+        # свої відкликання приходять і з revoke, і з локальної розсилки шини
+        if jti not in self.bloom:
+            self.bloom.add(jti)
+
+    def request_sync(self) -> None:
+        # запити, що прийшли під час позачергової перебудови, зливаються в ще одну після неї
+        if self._resync is not None and not self._resync.done():
+            self._resync_again = True
+            return
+        self._resync = asyncio.create_task(self._resync_loop())
+
+    async def _resync_loop(self) -> None:
+        self._resync_again = True
+        while self._resync_again:
+            self._resync_again = False
+            await self.sync()
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        """
+        The revoke function marks an access token as revoked until it expires
+        and tells every worker to add it to their filters.
+
+        :param jti: str: Token id
+        :param exp: float: Token expiry (unix time); the entry is dropped after it
+        :return: None
+        """
+        if self.redis is not None:
+            await self.redis.zadd(self.key, {jti: exp})
+        self.add_local(jti)
+        await invalidation_bus.publish(REVOKED, jti)
+
+    def maybe_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        return jti in self.bloom
+
+    async def confirm(self, jti: str) -> bool:
+        """
+        The confirm function checks a filter hit against the exact list.
+        If Redis cannot answer, the token is treated as revoked.
+
+        :param jti: str: Token id that matched the filter
+        :return: True if the token is revoked
+        """
+        self.positives += 1
+        if self.redis is None:
+            revoked = jti in self.local
+        else:
+            try:
+                exp = await self.redis.zscore(self.key, jti)
+            except RedisError as err:
+                logger.warning(f"Revocation check failed: {err}")
+                return True
+            revoked = exp is not None and exp > time.time()
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def sync(self) -> None:
+        """
+        The sync function rebuilds the filter from Redis, dropping expired entries.
+
+        :return: None
+        """
+        async with self._sync_lock:
+            # stop() міг прибрати Redis, поки чекали на попередню перебудову
+            if self.redis is not None:
+                await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        self._recent = []
+        try:
+            now = time.time()
+            await self.redis.zremrangebyscore(self.key, "-inf", now)
+            revoked = await self.redis.zrangebyscore(self.key, now, "+inf")
+        except RedisError as err:
+            logger.warning(f"Revocation sync failed: {err}")
+            return
+        finally:
+            recent, self._recent = self._recent, None
+        bloom = BloomFilter(max(self.capacity, len(revoked) + len(recent)), self.error_rate)
+        for jti in revoked:
+            bloom.add(jti if isinstance(jti, str) else jti.decode())
+        # відкликані, поки йшов запит до Redis
+        for jti in recent:
+            bloom.add(jti)
+        self.bloom = bloom
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    async def start(self, redis: Redis) -> None:
+        """
+        The start function loads the revoked tokens from Redis before the worker
+        serves requests and then rebuilds the filter every sync_interval seconds.
+
+        :param redis: Redis: Shared Redis client
+        :return: None
+        """
+        self.redis = redis
+        await self.sync()
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._resync):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._resync = None
+        self.redis = None
+
+    def stats(self) -> dict:
+        return {
+            "entries": self.bloom.count,
+            "bits": self.bloom.size,
+            "hashes": self.bloom.hashes,
+            "checks": self.checks,
+            "positives": self.positives,
+            "false_positives": self.false_positives,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.revocation_capacity,
+    error_rate=settings.revocation_error_rate,
+    sync_interval=settings.revocation_sync_interval,
+)
+invalidation_bus.subscribe(REVOKED, revocation_list.add_local)
@@ -8,8 +8,9 @@ from main import app
 from src.database.models import Base
 from src.database.conn_db import get_db
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 import pytest
 from fastapi.testclient import TestClient
@@ -17,12 +18,16 @@ from fastapi.testclient import TestClient
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+TestingSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
 
 
 # Фікстура для налаштування бази даних для кожного модульного тесту
@@ -30,14 +35,13 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def session():
     
     # Скидання та створення бази даних перед початком тестів
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(init_models())
 
     db = TestingSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        asyncio.run(db.close())
 
 
 # Фікстура для створення тестового клієнта для FastAPI
@@ -45,11 +49,11 @@ def session():
 def client(session):
    
 
-    def override_get_db():
+    async def override_get_db():
         try:
             yield session
         finally:
-            session.close()
+            await session.close()
 
     app.dependency_overrides[get_db] = override_get_db
 
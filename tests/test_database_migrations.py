@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from alembic import command
+from alembic.config import Config
+
+from src.config import settings
+from src.database.models import birthday_doy
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "contacts.db")
+        self.config = Config(os.path.join(ROOT, "alembic.ini"))
+        self.config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+        patcher = patch.object(settings, "sqlalchemy_database_url", f"sqlite:///{self.path}")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_upgrade_from_initial_schema_backfills_birthday_doy(self):
+        # база в стані до міграцій, з контактами
+        command.upgrade(self.config, "2f6d8c1a4b7e")
+        birthdays = [date(2000, 1, 1) + timedelta(days=i) for i in range(366)] + [date(1991, 3, 1), None]
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("INSERT INTO users (id, email, password) VALUES (1, 'owner@test.ua', 'x')")
+            conn.executemany(
+                "INSERT INTO contacts (email, phone, birthday, additional, description, user_id) "
+                "VALUES (?, '1', ?, 'None', 'tennis partner', 1)",
+                [(f"{i}@test.ua", value.isoformat() if value else None) for i, value in enumerate(birthdays)],
+            )
+
+        command.upgrade(self.config, "head")
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute("SELECT birthday, birthday_doy FROM contacts ORDER BY id").fetchall()
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            found = conn.execute("SELECT count(*) FROM contacts_fts WHERE contacts_fts MATCH 'tennis'").fetchone()
+        self.assertEqual([doy for _, doy in rows], [birthday_doy(value) for value in birthdays])
+        self.assertTrue({"ix_contacts_user_id_id", "ix_contacts_user_id_name_id",
+                         "ix_contacts_user_id_birthday_doy"} <= indexes)
+        self.assertEqual(found, (len(birthdays),))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.pool import TimedQueuePool, pool_status, warmup_pool
+
+
+class TestPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite://", poolclass=TimedQueuePool, pool_size=3, max_overflow=1
+        )
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_warmup_pool(self):
+        opened = await warmup_pool(self.engine, 10)
+        status = pool_status(self.engine)
+        self.assertEqual(opened, 3)  # не більше за pool_size
+        self.assertEqual(status["idle"], 3)
+        self.assertEqual(status["checked_out"], 0)
+        self.assertEqual(status["checkouts"], 3)
+
+    async def test_pool_status_checked_out(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("select 1"))
+            status = pool_status(self.engine)
+            self.assertEqual(status["checked_out"], 1)
+            self.assertEqual(status["overflow"], 0)
+        status = pool_status(self.engine)
+        self.assertEqual(status["checked_out"], 0)
+        self.assertGreaterEqual(status["wait_ms"]["max"], status["wait_ms"]["last"])
+
+
+if __name__ == '__main__':
+    unittest.main()
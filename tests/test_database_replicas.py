@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.models import Base, User
+from src.database.replicas import ReplicaSet, RoutingSession, read_staleness, use_primary
+
+
+class TestReplicaRouting(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{self.tmp.name}/primary.db")
+        replica = create_async_engine(f"sqlite+aiosqlite:///{self.tmp.name}/replica.db")
+
+        # однакова схема, але різні дані - щоб бачити, куди пішов запит
+        for engine, name in ((self.primary, "primary"), (replica, "replica")):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(User.__table__.insert().values(
+                    id=1, username=name, email="user@test.ua", password="x"))
+
+        self.replicas = ReplicaSet([replica], max_lag=5, check_interval=5)
+        self.Session = async_sessionmaker(self.primary, class_=AsyncSession, expire_on_commit=False,
+                                          sync_session_class=RoutingSession, replicas=self.replicas)
+
+    async def asyncTearDown(self):
+        await self.replicas.stop()
+        await self.primary.dispose()
+        self.tmp.cleanup()
+
+    async def username(self, db):
+        return (await db.execute(select(User.username).filter(User.id == 1))).scalar()
+
+    async def test_read_goes_to_replica(self):
+        async with self.Session() as db:
+            self.assertEqual(await self.username(db), "replica")
+
+    async def test_use_primary(self):
+        async with self.Session() as db:
+            use_primary(db)
+            self.assertEqual(await self.username(db), "primary")
+
+    async def test_reads_after_write_stay_on_primary(self):
+        async with self.Session() as db:
+            db.add(User(id=2, username="new", email="new@test.ua", password="x"))
+            await db.commit()
+            self.assertEqual(await self.username(db), "primary")
+
+    async def test_unhealthy_replica_falls_back_to_primary(self):
+        self.replicas.replicas[0].healthy = False
+        async with self.Session() as db:
+            self.assertEqual(await self.username(db), "primary")
+
+    async def test_check_marks_lagging_replica(self):
+        self.replicas.max_lag = -1
+        await self.replicas.check()
+        self.assertFalse(self.replicas.replicas[0].healthy)
+        self.assertIsNone(self.replicas.choose())
+
+    async def test_read_staleness(self):
+        async with self.Session() as db:
+            use_primary(db)
+            await self.username(db)
+            self.assertEqual(read_staleness(db), 0)
+        async with self.Session() as db:
+            await self.username(db)
+            # lag ще не виміряно
+            self.assertIsNone(read_staleness(db))
+            await self.replicas.check()
+            self.assertGreaterEqual(read_staleness(db), 0)
+            self.assertLess(read_staleness(db), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
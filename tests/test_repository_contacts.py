@@ -1,10 +1,8 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock
 import uuid
 
-from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-import asyncio
 from sqlalchemy.engine.result import ChunkedIteratorResult
 
 
@@ -20,22 +18,31 @@ print(os.environ.get('PYTHONPATH'))
 
 
 from src.database.models import Contact, User
-from src.schemas import ContactModel, ContactUpdate
+from pydantic import ValidationError
+
+from src.schemas import ContactModel, ContactUpdate, ContactUpsert, ContactBulkValues, ContactFilter
 from src.repository.contacts import (
     get_contacts,
+    get_contacts_page,
     get_contact,
     create_contact,
     remove_contact,
     update_contact,
     get_week_birthdays,
+    get_upcoming_birthdays,
+    birthday_doy_ranges,
     search_contacts,
+    bulk_update_contacts,
+    bulk_remove_contacts,
+    upsert_contacts,
+    contact_row,
     )
 
 
 class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = AsyncMock(spec=AsyncSession)
         # self.user = User(id=uuid.uuid4())
         self.user = User(id=1)
 
@@ -47,13 +54,36 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         age=25,
         description="some place",)
 
+    def set_result(self, contacts):
+        # результат await db.execute(...) з .scalars().all() / .scalars().first()
+        result = MagicMock(spec=ChunkedIteratorResult)
+        result.scalars.return_value.all.return_value = contacts
+        result.scalars.return_value.first.return_value = contacts[0] if contacts else None
+        self.session.execute.return_value = result
+
     async def test_get_contacts(self):
         contacts = [Contact(), Contact(), Contact()]
-        self.session.query().filter().offset().limit().all.return_value = contacts
+        self.set_result(contacts)
         result = await get_contacts(skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, contacts)
 
 
+    async def test_get_contacts_page(self):
+        contacts = [Contact(id=1, name="A"), Contact(id=2, name="B"), Contact(id=3, name="C")]
+        self.set_result(contacts)
+        result, next_key = await get_contacts_page(user=self.user, db=self.session, limit=2, order="name")
+        self.assertEqual(result, contacts[:2])
+        self.assertEqual(next_key, ("B", 2))
+
+
+    async def test_get_contacts_page_last(self):
+        contacts = [Contact(id=1), Contact(id=2)]
+        self.set_result(contacts)
+        result, next_key = await get_contacts_page(user=self.user, db=self.session, limit=2, after=(0,))
+        self.assertEqual(result, contacts)
+        self.assertIsNone(next_key)
+
+
     async def test_get_contact(self):
             contact_mock = Contact(
                 id=1,
@@ -62,36 +92,32 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
                 email="john@example.com",
                 phone="123456789",
             )
-            with patch("src.repository.contacts.Session.query") as query_mock:
-                query_mock.return_value.filter().first.return_value = contact_mock
+            self.set_result([contact_mock])
 
-                result = await get_contact(contact_id=1, user=self.user, db=self.session)
+            result = await get_contact(contact_id=1, user=self.user, db=self.session)
 
-                self.assertEqual(result.id, 1)
-                self.assertEqual(result.name, "John")
+            self.assertEqual(result.id, 1)
+            self.assertEqual(result.name, "John")
 
 
 
     async def test_get_contacts_not_found(self):
-            with patch("src.repository.contacts.Session.query") as query_mock:
-                query_mock.return_value.filter().offset().limit().return_value = []
+            self.set_result([])
 
-                result = await get_contacts(
-                    skip=0,
-                    limit=10,
-                    user=self.user,
-                    db=self.session,
-                )
-                self.assertEqual(len(result), 0, f"Expected an empty list but got {result}")
-                logging.info(f"Result: {result}")
+            result = await get_contacts(
+                skip=0,
+                limit=10,
+                user=self.user,
+                db=self.session,
+            )
+            self.assertEqual(len(result), 0, f"Expected an empty list but got {result}")
+            logging.info(f"Result: {result}")
 
-                query_mock.return_value.filter().offset().limit().assert_called_once_with(user=self.user)
+            self.session.execute.assert_awaited_once()
 
 
 
     async def test_create_contact(self):
-        self.session.execute.return_value = MagicMock(spec=ChunkedIteratorResult)
-        self.session.execute.return_value.scalar.return_value = None
         result = await create_contact(body=self.body, user=self.user, db=self.session)
         self.assertEqual(result.name, self.body.name)
         self.assertEqual(result.lastname, self.body.lastname)
@@ -100,79 +126,125 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         # self.assertEqual(result.age, self.body.age)
         # self.assertEqual(result.description, self.body.description)
         self.assertTrue(hasattr(result, "id"))
+        self.session.commit.assert_awaited_once()
 
 
     async def test_remove_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.set_result([contact])
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
+        self.session.delete.assert_awaited_once_with(contact)
 
 
     async def test_remove_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.set_result([])
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
+        self.session.commit.assert_not_awaited()
 
 
     async def test_update_contact_found(self):
             # Визначення
             contact = Contact()
-            db_mock = MagicMock()
-            db_mock.commit.return_value = None
-            self.session.query().filter().filter().first.return_value = contact
+            self.set_result([contact])
 
             # Коли
-            with patch("src.repository.contacts.Session", return_value=db_mock):
-                result = await update_contact(
-                    contact_id=contact.id,
-                    body=self.body,
-                    user=self.user,
-                    db=self.session,
-                )
+            result = await update_contact(
+                contact_id=contact.id,
+                body=ContactUpdate(email="new@test.ua"),
+                user=self.user,
+                db=self.session,
+            )
 
             # Then
             self.assertEqual(result, contact)  # Очікуваний результат
-            db_mock.commit.assert_called_once()  # чи був виклик один раз
+            self.assertEqual(result.email, "new@test.ua")
+            self.session.commit.assert_awaited_once()  # чи був виклик один раз
             logging.info(f"Result: {result}")
 
-    # async def test_update_contact_found(self):
-    #     # Визначення
-    #     contact = Contact()
-    #     db_mock = AsyncSession()
-    #     # db_mock.commit.return_value = None
-    #     db_mock.commit.return_value = await asyncio.Future()
 
-    #     self.session.query().filter().filter().first.return_value = contact
+    async def test_get_week_birthdays(self):
+        contacts = [Contact(), Contact(), Contact()]
+        self.set_result(contacts)
+        result = await get_week_birthdays(user=self.user, db=self.session)
+        self.assertEqual(result, contacts)
+
 
-    #     # Коли
-    #     with patch("sqlalchemy.ext.asyncio.AsyncSession", return_value=db_mock):
-    #         result = await update_contact(
-    #             contact_id=contact.id,
-    #             body=self.body,
-    #             user=self.user,
-    #             db=self.session,
-    #         )
+    async def test_get_upcoming_birthdays(self):
+        contacts = [Contact(), Contact()]
+        self.set_result(contacts)
+        result = await get_upcoming_birthdays(user=self.user, db=self.session, start=date(2023, 12, 28), days=10)
+        self.assertEqual(result, contacts)
 
-    #     # Then
-    #     self.assertEqual(result, contact)  
-    #     db_mock.commit.assert_called_once() 
-    #     logging.info(f"Result: {result}")
 
+    def test_birthday_doy(self):
+        self.assertEqual(Contact(birthday=date(1992, 2, 29)).birthday_doy, 60)
+        self.assertEqual(Contact(birthday=date(1991, 3, 1)).birthday_doy, 61)
+        self.assertIsNone(Contact(birthday=None).birthday_doy)
 
 
-    async def test_get_week_birthdays(self):
-        contacts = [Contact(), Contact(), Contact()]
-        self.session.query().filter().all.return_value = contacts
-        result = await get_week_birthdays(user=self.user, db=self.session)
-        self.assertEqual(result, contacts)
+    def test_birthday_doy_ranges(self):
+        # тиждень через два місяці
+        self.assertEqual(birthday_doy_ranges(date(2023, 1, 30), 7), [(30, 36)])
+        # через Новий рік
+        self.assertEqual(birthday_doy_ranges(date(2023, 12, 28), 7), [(363, 366), (1, 3)])
+        # 28 лютого невисокосного року захоплює і 29 лютого
+        self.assertEqual(birthday_doy_ranges(date(2023, 2, 28), 2), [(59, 61)])
+        self.assertEqual(birthday_doy_ranges(date(2023, 5, 1), 366), [(1, 366)])
 
 
     async def test_search_contacts(self):
         contacts = [Contact(), Contact(), Contact()]
-        self.session.query().filter().filter().all.return_value = contacts
+        self.set_result(contacts)
         result = await search_contacts(user=self.user, db=self.session, search_key="John")
         self.assertEqual(result, contacts)
 
+
+    async def test_bulk_update_contacts(self):
+        self.set_result([7, 3])
+        result = await bulk_update_contacts(ContactBulkValues(birthday=date(1991, 3, 1)), user=self.user,
+                                            db=self.session, ids=[3, 7, 8])
+        self.assertEqual(result, [3, 7])
+        stmt = self.session.execute.await_args.args[0]
+        # один UPDATE, birthday_doy оновлюється разом з birthday
+        self.assertEqual(stmt.compile().params["birthday_doy"], 61)
+        self.assertIn("RETURNING", str(stmt))
+        self.session.commit.assert_awaited_once()
+
+
+    async def test_bulk_remove_contacts(self):
+        self.set_result([2])
+        result = await bulk_remove_contacts(user=self.user, db=self.session, criteria=ContactFilter(name="Ol"))
+        self.assertEqual(result, [2])
+        self.assertTrue(str(self.session.execute.await_args.args[0]).startswith("DELETE"))
+        self.session.commit.assert_awaited_once()
+
+
+    async def test_upsert_contacts(self):
+        existing = MagicMock(spec=ChunkedIteratorResult)
+        existing.scalars.return_value.all.return_value = ["gv@test.ua"]
+        written = MagicMock(spec=ChunkedIteratorResult)
+        written.all.return_value = [("gv@test.ua",), ("new@test.ua",)]
+        self.session.execute.side_effect = [existing, written]
+
+        other = self.body.model_copy(update={"email": "new@test.ua"})
+        result = await upsert_contacts([self.body, other, other], user=self.user, db=self.session)
+        self.assertEqual(result, (1, 1, 0))
+        # повтор email у пачці відкидається, вставка - одним statement
+        self.assertEqual(len(self.session.execute.await_args.args[1]), 2)
+        self.session.commit.assert_awaited_once()
+
+    async def test_upsert_requires_email(self):
+        data = self.body.model_dump(exclude={"email"})
+        with self.assertRaises(ValidationError):
+            ContactUpsert(**data)
+        with self.assertRaises(ValidationError):
+            ContactUpsert(**data, email="not-an-email")
+        # ContactModel без email до Core-вставки не доходить
+        with self.assertRaises(ValueError):
+            contact_row(ContactModel(**data), self.user)
+        self.session.execute.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
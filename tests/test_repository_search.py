@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, Contact, User
+from src.repository.contacts import get_contacts_page, search_contacts
+from src.services.contacts_cache import dump_contacts
+
+
+class TestSearchContacts(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)()
+
+        self.user = User(id=1, username="owner", email="owner@test.ua", password="x")
+        other = User(id=2, username="other", email="other@test.ua", password="x")
+        self.session.add_all([self.user, other])
+        self.session.add_all([
+            Contact(name="Olena", lastname="Kovalenko", email="olena@mail.ua",
+                    phone="380671112233", description="colleague from Kyiv", user_id=1),
+            Contact(name="Oleh", lastname="Shevchenko", email="oleh@gmail.com",
+                    phone="380501234567", description="gym", user_id=1),
+            Contact(name="Petro", lastname="Olenko", email="petro@test.ua",
+                    phone="111", description="neighbour", user_id=1),
+            Contact(name="Olena", lastname="Stranger", email="olena2@test.ua",
+                    phone="222", description="", user_id=2),
+        ])
+        await self.session.commit()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def search(self, **kwargs):
+        contacts = await search_contacts(user=self.user, db=self.session, **kwargs)
+        return [contact.lastname for contact in contacts]
+
+    async def test_prefix_over_all_fields(self):
+        self.assertEqual(sorted(await self.search(search_key="olen")), ["Kovalenko", "Olenko"])
+        self.assertEqual(await self.search(search_key="gmail"), ["Shevchenko"])
+        self.assertEqual(await self.search(search_key="38050"), ["Shevchenko"])
+
+    async def test_all_words_must_match(self):
+        self.assertEqual(await self.search(search_key="kyiv ole"), ["Kovalenko"])
+
+    async def test_only_own_contacts(self):
+        self.assertNotIn("Stranger", await self.search(search_key="olena"))
+
+    async def test_index_follows_updates(self):
+        contact = await self.session.get(Contact, 2)
+        contact.description = "tennis partner"
+        await self.session.commit()
+        self.assertEqual(await self.search(search_key="tennis"), ["Shevchenko"])
+        self.assertEqual(await self.search(search_key="gym"), [])
+
+    async def test_fields_load_only_listed_columns(self):
+        # у identity map не має лишитися повністю завантажених контактів з setUp
+        self.session.expunge_all()
+        contacts = await search_contacts(user=self.user, db=self.session, search_key="gmail", fields=("id", "lastname"))
+        self.assertEqual(dump_contacts(contacts, ("id", "lastname")), [{"id": 2, "lastname": "Shevchenko"}])
+        with self.assertRaises(InvalidRequestError):
+            contacts[0].description
+
+    async def test_read_only_rows(self):
+        self.session.expunge_all()
+        rows = await search_contacts(user=self.user, db=self.session, search_key="olen", read_only=True)
+        # рядки не потрапляють в identity map, а серіалізуються так само, як ORM-об'єкти
+        self.assertEqual(len(self.session.identity_map), 0)
+        contacts = await search_contacts(user=self.user, db=self.session, search_key="olen")
+        self.assertEqual(dump_contacts(rows), dump_contacts(contacts))
+
+    async def test_name_pages_include_unnamed_tail(self):
+        self.session.add_all([
+            Contact(name=name, lastname=f"Page{index}", email=f"page{index}@test.ua", phone="333", user_id=1)
+            for index, name in enumerate([None, "Anna", None, "Oleh"])
+        ])
+        await self.session.commit()
+        for limit in (1, 2, 3, 10):
+            seen, after = [], None
+            while True:
+                contacts, after = await get_contacts_page(self.user, self.session, limit, order="name", after=after)
+                seen += [(contact.name, contact.id) for contact in contacts]
+                if after is None:
+                    break
+            # за іменем, при однаковому імені - за id, контакти без імені - у кінці
+            self.assertEqual(seen, [("Anna", 6), ("Oleh", 2), ("Oleh", 8), ("Olena", 1), ("Petro", 3),
+                                    (None, 5), (None, 7)], limit)
+
+    async def test_prefix_filters(self):
+        self.assertEqual(await self.search(search_key="ole", lastname="SH"), ["Shevchenko"])
+        self.assertEqual(sorted(await self.search(name="ol")), ["Kovalenko", "Shevchenko"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes import internal
+
+
+class TestInternalRoutes(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(internal.router, prefix="/api")
+        self.client = TestClient(app)
+
+    def test_disabled_without_token(self):
+        with patch.object(internal.settings, "internal_token", ""):
+            self.assertEqual(self.client.get("/api/internal/cache").status_code, 404)
+            response = self.client.get("/api/internal/cache", headers={"Authorization": "Bearer "})
+            self.assertEqual(response.status_code, 404)
+
+    def test_requires_token(self):
+        with patch.object(internal.settings, "internal_token", "s3cret"):
+            self.assertEqual(self.client.get("/api/internal/cache").status_code, 401)
+            response = self.client.get("/api/internal/cache", headers={"Authorization": "Bearer wrong"})
+            self.assertEqual(response.status_code, 401)
+            response = self.client.get("/api/internal/cache", headers={"Authorization": "Bearer s3cret"})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("hits", response.json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+from src.services.auth import ACCESS_TOKEN_TTL, MAX_TOKEN_TTL, Auth, auth_service
+from src.services.keyring import KeyRing
+from src.services.refresh_tokens import REFRESH_TOKEN_TTL
+
+
+def make_auth(rounds: int) -> Auth:
+    return Auth(schemes=["bcrypt"], deprecated="auto", secret_key="test", algorithm="HS256",
+                bcrypt_rounds=rounds, hash_workers=1)
+
+
+class TestPasswordHashing(unittest.IsolatedAsyncioTestCase):
+
+    async def test_hash_in_pool(self):
+        auth = make_auth(4)
+        threads = []
+        auth.pwd_context.hash = lambda password: threads.append(threading.current_thread().name) or "hash"
+        self.assertEqual(await auth.hash_password("secret"), "hash")
+        self.assertTrue(threads[0].startswith("bcrypt"))
+
+    async def test_verify_and_rehash_on_cost_change(self):
+        old_hash = make_auth(4).get_password_hash("secret")
+        auth = make_auth(5)
+
+        self.assertEqual(await auth.verify_and_update_password("wrong", old_hash), (False, None))
+        valid, new_hash = await auth.verify_and_update_password("secret", old_hash)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith("$2b$05$"))
+        # хеш з поточною вартістю не перераховується
+        self.assertEqual(await auth.verify_and_update_password("secret", new_hash), (True, None))
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def make_token(self, auth: Auth, exp: float) -> str:
+        return jwt.encode({"sub": "user@example.com", "scope": "access_token", "exp": exp},
+                          auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+
+    def test_decode_once(self):
+        auth = make_auth(4)
+        token = self.make_token(auth, time.time() + 60)
+        with patch("src.services.keyring.jwt.decode", wraps=jwt.decode) as decode:
+            first = auth.decode_access_token(token)
+            second = auth.decode_access_token(token)
+        self.assertEqual(first, second)
+        self.assertEqual(decode.call_count, 1)
+        # у кеші лише хеш токена
+        self.assertNotIn(token, auth.token_cache)
+
+    def test_expired_entry_is_verified_again(self):
+        auth = make_auth(4)
+        token = self.make_token(auth, time.time() + 60)
+        auth.decode_access_token(token)
+        key = next(iter(auth.token_cache))
+        kid, payload = auth.token_cache[key]
+        auth.token_cache[key] = (kid, dict(payload, exp=time.time() - 1))
+        with patch("src.services.keyring.jwt.decode", side_effect=JWTError("expired")):
+            with self.assertRaises(JWTError):
+                auth.decode_access_token(token)
+        self.assertEqual(len(auth.token_cache), 0)
+
+    def test_retired_key_rejects_cached_token(self):
+        with tempfile.TemporaryDirectory() as keys_dir:
+            ring = KeyRing(keys_dir=keys_dir, algorithm="ES256", max_keys=1, activate_after=0,
+                           reload_interval=0, secret_key="test", secret_algorithm="HS256",
+                           legacy_until=time.time() + 3600, legacy_max_age=3600)
+            auth = Auth(schemes=["bcrypt"], deprecated="auto", secret_key="test", algorithm="HS256",
+                        bcrypt_rounds=4, hash_workers=1, keyring=ring)
+            ring.rotate()
+            token = ring.encode({"sub": "user@example.com", "scope": "access_token", "exp": time.time() + 60})
+            legacy = self.make_token(auth, time.time() + 60)
+            auth.decode_access_token(token)
+            auth.decode_access_token(legacy)
+            self.assertEqual(len(auth.token_cache), 2)
+
+            # ротація в іншому процесі прибирає ключ, яким підписано закешований токен
+            time.sleep(0.01)
+            KeyRing(keys_dir=keys_dir, algorithm="ES256", max_keys=1).rotate()
+            # і настала межа прийому HS256-токенів
+            ring.legacy_until = time.time()
+            for cached in (token, legacy):
+                with self.assertRaises(HTTPException) as err:
+                    asyncio.run(auth.get_current_user(cached, db=None))
+                self.assertEqual(err.exception.status_code, 401)
+            self.assertEqual(len(auth.token_cache), 0)
+
+    def test_bounded(self):
+        auth = make_auth(4)
+        auth.token_cache_size = 2
+        tokens = [self.make_token(auth, time.time() + 60 + i) for i in range(3)]
+        for token in tokens:
+            auth.decode_access_token(token)
+        self.assertEqual(len(auth.token_cache), 2)
+
+
+
+class TestTokenLifetimes(unittest.IsolatedAsyncioTestCase):
+
+    async def test_legacy_cutoff_covers_every_token(self):
+        auth = make_auth(4)
+        payload = jwt.get_unverified_claims(await auth.create_access_token({"sub": "a"}))
+        self.assertAlmostEqual(payload["exp"] - payload["iat"], ACCESS_TOKEN_TTL.total_seconds(), delta=2)
+        # HS256-токен, виданий перед першим ключем, має дожити до свого exp
+        self.assertGreaterEqual(auth_service.keyring.legacy_max_age, ACCESS_TOKEN_TTL.total_seconds())
+        self.assertGreaterEqual(auth_service.keyring.legacy_max_age, REFRESH_TOKEN_TTL.total_seconds())
+        self.assertEqual(auth_service.keyring.legacy_max_age, MAX_TOKEN_TTL.total_seconds())
+
+
+if __name__ == '__main__':
+    unittest.main()
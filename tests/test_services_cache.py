@@ -0,0 +1,286 @@
+import json
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from redis.exceptions import ConnectionError, WatchError
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Contact, User
+from src.database.replicas import ReplicaSet, RoutingSession
+from src.services.cache import ContactCache, UserCache
+from src.services import contacts_cache
+from src.services.contacts_cache import contacts_json, dump_contacts
+from src.services.metrics import TimedJSONResponse
+
+
+class TestContactCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.hget = AsyncMock(return_value=None)
+        self.redis.get = AsyncMock(return_value=None)
+        self.redis.delete = AsyncMock()
+        self.redis.expire = AsyncMock()
+        self.pipe = MagicMock()
+        self.pipe.hset.return_value = self.pipe.hlen.return_value = self.pipe.ttl.return_value = self.pipe
+        self.pipe.incr.return_value = self.pipe.delete.return_value = self.pipe
+        self.pipe.watch = AsyncMock()
+        self.pipe.get = AsyncMock(return_value=None)
+        self.pipe.execute = AsyncMock(return_value=[1, 1, -1])
+        self.redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=self.pipe)
+        self.redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        self.cache = ContactCache(ttl=60, max_entries=2, max_bytes=100)
+        self.cache.init(self.redis)
+
+    async def test_miss_then_hit(self):
+        load = AsyncMock(return_value=[{"id": 1}])
+        self.assertEqual(await self.cache.get_or_load(7, "contact:1", load), [{"id": 1}])
+        self.pipe.hset.assert_called_once_with("contacts:7", "contact:1", '[{"id":1}]')
+        # новий hash отримує TTL
+        self.redis.expire.assert_awaited_once_with("contacts:7", 60)
+
+        self.redis.hget.return_value = json.dumps([{"id": 1}])
+        self.assertEqual(await self.cache.get_or_load(7, "contact:1", load), [{"id": 1}])
+        load.assert_awaited_once()
+        self.assertEqual(self.cache.stats()["hit_rate"], 0.5)
+
+    async def test_bounds(self):
+        await self.cache.set(7, "big", "x" * 200)
+        self.pipe.hset.assert_not_called()
+
+        self.pipe.execute.return_value = [1, 3, 50]
+        await self.cache.set(7, "page", [])
+        self.redis.delete.assert_awaited_once_with("contacts:7")
+
+    async def test_redis_errors_fall_back_to_load(self):
+        self.redis.hget.side_effect = ConnectionError("down")
+        self.pipe.execute.side_effect = ConnectionError("down")
+        load = AsyncMock(return_value=[])
+        self.assertEqual(await self.cache.get_or_load(7, "week", load), [])
+        self.assertEqual(self.cache.stats()["errors"], 2)
+
+    async def test_invalidate(self):
+        await self.cache.invalidate(7)
+        # hash видаляється, версія зростає - в одній транзакції
+        self.pipe.incr.assert_called_once_with("contacts_version:7")
+        self.pipe.delete.assert_called_once_with("contacts:7")
+        self.pipe.execute.assert_awaited_once()
+        self.cache.init(None)
+        await self.cache.invalidate(7)
+        self.pipe.execute.assert_awaited_once()
+
+    async def test_load_overlapping_invalidate_is_not_cached(self):
+        self.redis.get.return_value = b"3"
+
+        async def load():
+            # запис контактів під час завантаження
+            self.pipe.get.return_value = b"4"
+            return [{"id": 1}]
+
+        self.assertEqual(await self.cache.get_or_load(7, "week", load), [{"id": 1}])
+        self.pipe.watch.assert_awaited_once_with("contacts_version:7")
+        self.pipe.hset.assert_not_called()
+
+        # версія не змінилась - значення кешується
+        self.pipe.get.return_value = b"3"
+        self.redis.get.return_value = b"3"
+        await self.cache.get_or_load(7, "week", AsyncMock(return_value=[]))
+        self.pipe.hset.assert_called_once_with("contacts:7", "week", "[]")
+
+    async def test_invalidate_before_exec_is_not_cached(self):
+        # invalidate між WATCH і EXEC: Redis не виконує транзакцію
+        self.pipe.execute.side_effect = WatchError()
+        await self.cache.set(7, "week", [], None)
+        self.redis.expire.assert_not_called()
+        self.assertEqual(self.cache.stats()["errors"], 0)
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cache = UserCache(max_size=2, ttl=60)
+        self.load = AsyncMock(side_effect=lambda: User(id=1, email="a@test.ua", password="x",
+                                                       created_at=datetime(2023, 11, 1, 10, 0)))
+
+    async def test_local_hit_returns_fresh_detached_user(self):
+        first = await self.cache.get_or_load("a@test.ua", self.load)
+        second = await self.cache.get_or_load("a@test.ua", self.load)
+        self.load.assert_awaited_once()
+        self.assertIsNot(first, second)
+        self.assertEqual((second.id, second.email), (1, "a@test.ua"))
+        self.assertEqual(self.cache.stats()["hit_rate"], 0.5)
+
+    async def test_lru_ttl_and_evict(self):
+        for email in ("a", "b", "c"):
+            await self.cache.get_or_load(email, self.load)
+        self.assertEqual(list(self.cache.entries), ["b", "c"])
+
+        self.cache.evict("b")
+        self.assertEqual(list(self.cache.entries), ["c"])
+        with patch("src.services.cache.time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(self.cache.get_local("c"))
+
+    async def test_evict_during_load_is_not_cached(self):
+        async def load():
+            self.cache.evict("a@test.ua")
+            return User(id=1, email="a@test.ua", password="x")
+
+        self.assertIsNotNone(await self.cache.get_or_load("a@test.ua", load))
+        self.assertEqual(len(self.cache.entries), 0)
+
+    async def test_redis_level(self):
+        redis = MagicMock()
+        redis.get = AsyncMock(return_value=None)
+        redis.set = AsyncMock()
+        cache = UserCache(max_size=2, ttl=60, use_redis=True)
+        cache.init(redis)
+
+        await cache.get_or_load("a@test.ua", self.load)
+        raw = redis.set.await_args.args[1]
+        redis.get.return_value = raw
+        cache.evict(None)
+
+        user = await cache.get_or_load("a@test.ua", self.load)
+        self.load.assert_awaited_once()
+        self.assertEqual(user.created_at, datetime(2023, 11, 1, 10, 0))
+        self.assertEqual(cache.stats()["redis_hits"], 1)
+
+        # значення, завантажене до evict, не потрапляє і в Redis
+        redis.get.return_value = None
+        cache.evict(None)
+
+        async def load():
+            cache.evict("a@test.ua")
+            return User(id=1, email="a@test.ua", password="x")
+
+        await cache.get_or_load("a@test.ua", load)
+        redis.set.assert_awaited_once()
+
+
+    async def test_replica_read_after_change_is_not_cached(self):
+        self.cache.evict("a@test.ua")
+        # репліка відстає на 5 с, а користувач змінився щойно
+        user = await self.cache.get_or_load("a@test.ua", self.load, lambda: 5.0)
+        self.assertEqual(user.id, 1)
+        self.assertNotIn("a@test.ua", self.cache.entries)
+        self.assertEqual(self.cache.stats()["stale_skips"], 1)
+        # прочитане з primary (або з репліки без відставання) кешується
+        await self.cache.get_or_load("a@test.ua", self.load, lambda: 0.0)
+        self.assertIn("a@test.ua", self.cache.entries)
+
+    async def test_secrets_are_not_cached(self):
+        redis = MagicMock()
+        redis.get = AsyncMock(return_value=None)
+        redis.set = AsyncMock()
+        cache = UserCache(max_size=2, ttl=60, use_redis=True)
+        cache.init(redis)
+
+        async def load():
+            return User(id=1, email="a@test.ua", username="alice", password="$2b$12$hash",
+                        refresh_token="token", confirmed=True)
+
+        user = await cache.get_or_load("a@test.ua", load)
+        stored = json.loads(redis.set.await_args.args[1])
+        _, local = cache.entries["a@test.ua"]
+        for columns in (stored, local):
+            self.assertNotIn("password", columns)
+            self.assertNotIn("refresh_token", columns)
+        self.assertEqual((user.id, user.username, user.confirmed), (1, "alice", True))
+
+        # старий запис у Redis з хешем пароля - хеш відкидається
+        cache.evict(None)
+        redis.get.return_value = json.dumps(dict(stored, password="$2b$12$hash"))
+        await cache.get_or_load("a@test.ua", load)
+        _, local = cache.entries["a@test.ua"]
+        self.assertNotIn("password", local)
+
+
+class TestContactLoaders(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{self.tmp.name}/primary.db")
+        replica = create_async_engine(f"sqlite+aiosqlite:///{self.tmp.name}/replica.db")
+        # однакова схема, різні дані - щоб бачити, звідки прочитано
+        for engine, name in ((self.primary, "primary"), (replica, "replica")):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(Contact.__table__.insert().values(
+                    id=1, name=name, lastname="Test", email=f"{name}@test.ua", phone="12345", user_id=7))
+        self.replicas = ReplicaSet([replica], max_lag=5, check_interval=5)
+        await self.replicas.check()
+        self.Session = async_sessionmaker(self.primary, class_=AsyncSession, expire_on_commit=False,
+                                          sync_session_class=RoutingSession, replicas=self.replicas)
+
+        redis = MagicMock()
+        redis.hget = AsyncMock(return_value=None)
+        redis.get = AsyncMock(return_value=None)
+        redis.expire = AsyncMock()
+        self.pipe = MagicMock()
+        self.pipe.hset.return_value = self.pipe.hlen.return_value = self.pipe.ttl.return_value = self.pipe
+        self.pipe.watch = AsyncMock()
+        self.pipe.get = AsyncMock(return_value=None)
+        self.pipe.execute = AsyncMock(return_value=[1, 1, -1])
+        redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=self.pipe)
+        redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        self.cache = ContactCache(ttl=60, max_entries=10, max_bytes=10000)
+        self.cache.init(redis)
+
+    async def asyncTearDown(self):
+        await self.replicas.stop()
+        await self.primary.dispose()
+        self.tmp.cleanup()
+
+    async def read(self) -> dict:
+        with patch("src.services.contacts_cache.contact_cache", self.cache):
+            async with self.Session() as db:
+                return await contacts_cache.get_contact(1, User(id=7), db)
+
+    async def test_replica_read_is_cached(self):
+        contact = await self.read()
+        self.assertEqual(contact["name"], "replica")
+        self.pipe.hset.assert_called_once()
+
+    async def test_replica_behind_recent_write_is_not_cached(self):
+        self.replicas.replicas[0].lag = 3.0
+        self.cache.changed("7")
+        self.assertEqual((await self.read())["name"], "replica")
+        self.pipe.hset.assert_not_called()
+        self.assertEqual(self.cache.stats()["stale_skips"], 1)
+
+        # запис давніший за відставання репліки - значення кешується
+        self.cache.changes.times["7"] -= 10
+        await self.read()
+        self.pipe.hset.assert_called_once()
+
+    async def test_unknown_lag_is_not_cached(self):
+        self.replicas.replicas[0].lag = None
+        await self.read()
+        self.pipe.hset.assert_not_called()
+
+
+class TestDumpContacts(unittest.TestCase):
+
+    def test_dict_and_bytes_paths_match(self):
+        created = datetime(2024, 1, 2, 3, 4, 5)
+        contacts = [Contact(id=i, name="Olena", lastname="Kovalenko", email=f"{i}@mail.ua", phone="380671112233",
+                            birthday=date(1990, 5, 17) if i else None, description="", created_at=created,
+                            updated_at=created, user_id=1) for i in range(3)]
+        dumped = dump_contacts(contacts)
+        self.assertEqual(dumped[1]["birthday"], "1990-05-17")
+        self.assertIsNone(dumped[0]["birthday"])
+        self.assertEqual(dumped[2]["created_at"], "2024-01-02T03:04:05")
+        # готові байти віддаються як є, dict - через orjson; результат однаковий
+        self.assertEqual(TimedJSONResponse(contacts_json(contacts)).body, TimedJSONResponse(dumped).body)
+        self.assertEqual(json.loads(contacts_json(contacts)), dumped)
+
+
+if __name__ == '__main__':
+    unittest.main()
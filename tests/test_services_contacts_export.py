@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, Contact, User
+from src.repository.contacts import EXPORT_COLUMNS, stream_contacts
+from src.services.contacts_export import csv_chunk, ndjson_chunk
+
+
+class TestContactsExport(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)()
+
+        self.user = User(id=1, username="owner", email="owner@test.ua", password="x")
+        other = User(id=2, username="other", email="other@test.ua", password="x")
+        self.session.add_all([self.user, other])
+        self.session.add_all([
+            Contact(id=5, name="Olena", lastname="Kovalenko", email="olena@mail.ua", phone="380671112233",
+                    birthday=date(1990, 5, 1), description="colleague, from Kyiv", user_id=1),
+            Contact(id=2, name="Oleh", lastname="Shevchenko", email="oleh@gmail.com", phone="380501234567", user_id=1),
+            Contact(id=3, name="Stranger", lastname="X", email="x@test.ua", phone="222", user_id=2),
+            Contact(id=9, name="Petro", lastname="Olenko", email="petro@test.ua", phone="111", user_id=1),
+        ])
+        await self.session.commit()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_stream_in_batches_ordered_by_id(self):
+        batches = [rows async for rows in stream_contacts(self.user, self.session, batch_size=2)]
+        self.assertEqual([[row.id for row in rows] for rows in batches], [[2, 5], [9]])
+
+    async def test_ndjson_and_csv(self):
+        rows = [row for batch in [rows async for rows in stream_contacts(self.user, self.session)] for row in batch]
+        lines = ndjson_chunk(rows).decode().splitlines()
+        self.assertEqual(json.loads(lines[1])["birthday"], "1990-05-01")
+        self.assertEqual(list(json.loads(lines[0])), list(EXPORT_COLUMNS))
+
+        data = (csv_chunk([], header=True) + csv_chunk(rows)).decode()
+        table = list(csv.reader(io.StringIO(data)))
+        self.assertEqual(table[0], list(EXPORT_COLUMNS))
+        self.assertEqual(table[2][EXPORT_COLUMNS.index("description")], "colleague, from Kyiv")
+
+    async def test_selected_columns(self):
+        columns = ("name", "phone")
+        rows = [row for batch in [rows async for rows in stream_contacts(self.user, self.session, columns=columns)]
+                for row in batch]
+        self.assertEqual(json.loads(ndjson_chunk(rows).decode().splitlines()[0]), {"name": "Oleh", "phone": "380501234567"})
+        data = (csv_chunk([], header=True, columns=columns) + csv_chunk(rows)).decode()
+        self.assertEqual(list(csv.reader(io.StringIO(data)))[:2], [["name", "phone"], ["Oleh", "380501234567"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+
+from src.services.contacts_import import detect_format, open_rows, validate_batch
+
+
+CSV = b"""name,lastname,email,phone,birthday,description,age
+Olena,Kovalenko,olena@mail.ua,380671112233,1990-05-01,"colleague,
+from Kyiv",33
+X,Y,bad,1,,d,old
+"""
+
+VCARD = b"""BEGIN:VCARD\r
+VERSION:3.0\r
+N:Shevchenko;Taras;;;\r
+EMAIL;TYPE=home:taras@test.ua\r
+TEL;TYPE=cell:+38050123\r
+ 4567\r
+BDAY:18140309\r
+NOTE:poet\r
+END:VCARD\r
+"""
+
+
+class TestContactsImport(unittest.TestCase):
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("book.VCF", None), "vcard")
+        self.assertEqual(detect_format("book.txt", "jsonl"), "jsonl")
+        self.assertIsNone(detect_format("book.txt", None))
+
+    def test_csv(self):
+        count, valid, errors = validate_batch(open_rows(io.BytesIO(CSV), "csv"))
+        self.assertEqual(count, 2)
+        self.assertEqual(valid[0][1].description, "colleague,\nfrom Kyiv")
+        self.assertEqual(valid[0][1].birthday, date(1990, 5, 1))
+        self.assertEqual(errors[0]["row"], 4)
+        self.assertIn("age", errors[0]["error"])
+
+    def test_jsonl(self):
+        data = b'{"name": "Json", "lastname": "Line", "phone": "12345", "description": "", "age": 1}\n\n[1]\n'
+        count, valid, errors = validate_batch(open_rows(io.BytesIO(data), "jsonl"))
+        self.assertEqual((count, len(valid)), (2, 0))
+        self.assertEqual([e["row"] for e in errors], [1, 3])
+        self.assertEqual(errors[0]["error"], "email: Field required")
+
+    def test_vcard(self):
+        count, valid, errors = validate_batch(open_rows(io.BytesIO(VCARD), "vcard"))
+        self.assertEqual((count, errors), (1, []))
+        contact = valid[0][1]
+        self.assertEqual((contact.name, contact.lastname), ("Taras", "Shevchenko"))
+        self.assertEqual(contact.phone, "+380501234567")
+        self.assertEqual(contact.birthday, date(1814, 3, 9))
+        self.assertEqual(contact.description, "poet")
+
+    def test_batches(self):
+        rows = open_rows(io.BytesIO(b"".join(b'{"x": %d}\n' % i for i in range(5))), "jsonl")
+        self.assertEqual(validate_batch(rows, size=3)[0], 3)
+        self.assertEqual(validate_batch(rows, size=3)[0], 2)
+        self.assertEqual(validate_batch(rows, size=3)[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
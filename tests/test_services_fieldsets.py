@@ -0,0 +1,31 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+
+from src.services.fieldsets import parse_fields
+
+
+ALLOWED = ("id", "name", "lastname", "email")
+
+
+class TestParseFields(unittest.TestCase):
+
+    def test_order_and_required(self):
+        self.assertEqual(parse_fields(" lastname,name ,", ALLOWED, required=("id",)), ("id", "name", "lastname"))
+        # усі поля - те саме, що без fields
+        self.assertIsNone(parse_fields("email,name,lastname", ALLOWED, required=("id",)))
+        self.assertIsNone(parse_fields(None, ALLOWED))
+
+    def test_unknown_or_empty(self):
+        for fields in ("name,password", ","):
+            with self.assertRaises(HTTPException) as err:
+                parse_fields(fields, ALLOWED)
+            self.assertEqual(err.exception.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
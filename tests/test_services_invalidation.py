@@ -0,0 +1,81 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.cache import contact_cache
+from src.services.invalidation import InvalidationBus, USER, CONTACTS, invalidation_bus
+
+
+class TestInvalidationBus(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # два воркери, спільний Redis
+        self.redis = MagicMock()
+        self.redis.publish = AsyncMock()
+        self.writer, self.reader = InvalidationBus(), InvalidationBus()
+        self.writer.redis = self.reader.redis = self.redis
+        self.writer_evicted, self.reader_evicted = [], []
+        self.writer.subscribe(USER, self.writer_evicted.append)
+        self.reader.subscribe(USER, self.reader_evicted.append)
+
+    async def test_publish_evicts_everywhere_once(self):
+        await self.writer.publish(USER, "a@test.ua")
+        self.assertEqual(self.writer_evicted, ["a@test.ua"])
+
+        channel, message = self.redis.publish.await_args.args
+        self.assertEqual(channel, "invalidate")
+        self.reader.handle_message(message)
+        self.assertEqual(self.reader_evicted, ["a@test.ua"])
+        # своє повідомлення, що повернулося з Redis, не обробляється вдруге
+        self.writer.handle_message(message)
+        self.assertEqual(self.writer_evicted, ["a@test.ua"])
+
+    async def test_topics_and_reset(self):
+        await self.writer.publish(CONTACTS, 7)
+        self.assertEqual(self.writer_evicted, [])
+        self.reader.reset()
+        self.assertEqual(self.reader_evicted, [None])
+
+    async def test_without_redis(self):
+        bus = InvalidationBus()
+        evicted = []
+        bus.subscribe(CONTACTS, evicted.append)
+        await bus.publish(CONTACTS, 7)
+        self.assertEqual(evicted, ["7"])
+
+
+    async def test_contacts_topic_reaches_contact_cache(self):
+        # запис контактів на іншому воркері: цей запам'ятовує час зміни користувача 7
+        message = json.dumps({"node": "other", "topic": CONTACTS, "key": "7"})
+        invalidation_bus.handle_message(message)
+        self.assertIn("7", contact_cache.changes.times)
+
+    async def test_listen(self):
+        async def listen():
+            yield {"type": "subscribe", "data": 1}
+            yield {"type": "message", "data": json.dumps({"node": "other", "topic": USER, "key": "b@test.ua"})}
+            await asyncio.Event().wait()
+
+        pubsub = MagicMock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.listen = listen
+        self.redis.pubsub.return_value.__aenter__ = AsyncMock(return_value=pubsub)
+        self.redis.pubsub.return_value.__aexit__ = AsyncMock(return_value=None)
+
+        self.reader.start(self.redis)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.assertTrue(self.reader.stats()["connected"])
+        # після підписки локальні кеші скидаються, далі - повідомлення інших воркерів
+        self.assertEqual(self.reader_evicted, [None, "b@test.ua"])
+        await self.reader.stop()
+        self.assertFalse(self.reader.stats()["connected"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jose import JWTError, jwt
+
+from src.services.keyring import KeyRing
+
+
+class TestKeyRing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.ring = self.make_ring()
+
+    def make_ring(self, **kwargs) -> KeyRing:
+        options = dict(keys_dir=self.tmp.name, algorithm="ES256", max_keys=2, activate_after=0,
+                       secret_key="secret", secret_algorithm="HS256")
+        options.update(kwargs)
+        ring = KeyRing(**options)
+        ring.load()
+        return ring
+
+    def test_sign_with_kid_and_verify(self):
+        key = self.ring.rotate()
+        token = self.ring.encode({"sub": "user@example.com"})
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], key.kid)
+        self.assertEqual(self.ring.decode(token), {"sub": "user@example.com"})
+
+        # перевірка лише публічним ключем з JWKS, без секрету
+        public = self.ring.jwks()["keys"][0]
+        self.assertEqual((public["kid"], public["alg"], public["use"]), (key.kid, "ES256", "sig"))
+        self.assertEqual(jwt.decode(token, public, algorithms=["ES256"]), {"sub": "user@example.com"})
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        self.ring = self.make_ring(reload_interval=0)
+        self.ring.rotate()
+        old_token = self.ring.encode({"sub": "a"})
+        time.sleep(0.01)
+        new_key = self.make_ring().rotate()
+
+        # ключ з'явився в іншому процесі - підхоплюється за невідомим kid
+        self.assertEqual(self.ring.decode(old_token), {"sub": "a"})
+        new_token = self.make_ring().encode({"sub": "b"})
+        self.assertEqual(jwt.get_unverified_header(new_token)["kid"], new_key.kid)
+        self.assertEqual(self.ring.decode(new_token), {"sub": "b"})
+
+    def test_retired_key_rejected(self):
+        self.ring.rotate()
+        token = self.ring.encode({"sub": "a"})
+        for _ in range(2):
+            time.sleep(0.01)
+            self.ring.rotate()
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+        with self.assertRaises(JWTError):
+            self.make_ring().decode(token)
+
+    def test_new_key_not_active_before_delay(self):
+        first = self.ring.rotate()
+        ring = self.make_ring(activate_after=3600)
+        ring.rotate()
+        # новий ключ уже в JWKS, але підписує ще старий
+        self.assertEqual(len(ring.jwks()["keys"]), 2)
+        self.assertEqual(ring.active.kid, first.kid)
+
+    def test_secret_fallback_and_no_algorithm_confusion(self):
+        legacy = jwt.encode({"sub": "a"}, "secret", algorithm="HS256")
+        self.assertEqual(self.ring.decode(legacy), {"sub": "a"})
+
+        key = self.ring.rotate()
+        # HS256 з kid асиметричного ключа не приймається
+        forged = jwt.encode({"sub": "a"}, "secret", algorithm="HS256", headers={"kid": key.kid})
+        with self.assertRaises(JWTError):
+            self.ring.decode(forged)
+        # після появи ключа токени без kid більше не приймаються
+        with self.assertRaises(JWTError):
+            self.ring.decode(legacy)
+
+    def test_legacy_tokens_until_cutoff(self):
+        legacy = jwt.encode({"sub": "a"}, "secret", algorithm="HS256")
+        ring = self.make_ring(legacy_until=time.time() + 3600, legacy_max_age=7 * 24 * 3600)
+        ring.rotate()
+        self.assertEqual(ring.decode(legacy), {"sub": "a"})
+        # межа не пізніше за найстаріший ключ + найдовший строк життя токена
+        ring = self.make_ring(legacy_until=time.time() + 3600, legacy_max_age=0)
+        with self.assertRaises(JWTError):
+            ring.decode(legacy)
+
+    def test_unknown_kid_does_not_reread_keys(self):
+        key = self.ring.rotate()
+        forged = jwt.encode({"sub": "a"}, "secret", algorithm="HS256", headers={"kid": "missing"})
+        loaded_at = self.ring.loaded_at
+        for _ in range(3):
+            with self.assertRaises(JWTError):
+                self.ring.decode(forged)
+        self.assertEqual(self.ring.loaded_at, loaded_at)
+        self.assertIn(key.kid, self.ring.keys)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.services.metrics import (
+    Metrics, RequestTiming, ServerTimingMiddleware, current_timing, instrument_engine, phase
+)
+
+
+class TestRequestTiming(unittest.IsolatedAsyncioTestCase):
+
+    def test_phase_outside_request(self):
+        with phase("auth"):
+            pass
+        self.assertIsNone(current_timing.get())
+
+    def test_server_timing_header(self):
+        timing = RequestTiming()
+        timing.add("db", 1_500_000)
+        timing.add("db", 500_000)
+        timing.add("auth", 20_000)
+        self.assertEqual(timing.server_timing(5_000_000),
+                         'db;dur=2.000;desc="2x", auth;dur=0.020, total;dur=5.000')
+
+    async def test_sql_statements_counted(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+        finally:
+            current_timing.reset(token)
+            await engine.dispose()
+        self.assertEqual(timing.phases["db"][1], 2)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_render_histogram_and_queries(self):
+        metrics = Metrics()
+        timing = RequestTiming()
+        timing.add("db", 2_000_000)
+        metrics.observe("GET", "/api/contacts/", 200, 0.004, timing)
+        metrics.observe("GET", "/api/contacts/", 200, 0.2, timing)
+        body = metrics.render()
+
+        labels = 'method="GET",route="/api/contacts/",status="200"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn('http_request_db_queries_total{method="GET",route="/api/contacts/"} 2', body)
+        self.assertIn('http_request_phase_seconds_total{method="GET",route="/api/contacts/",phase="db"} 0.004', body)
+
+
+class TestServerTimingMiddleware(unittest.TestCase):
+
+    def test_header_and_route_metrics(self):
+        registry = Metrics()
+        app = FastAPI()
+        app.add_middleware(ServerTimingMiddleware, registry=registry)
+
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: int):
+            with phase("db"):
+                pass
+            return {"id": item_id}
+
+        @app.get("/stream")
+        async def stream():
+            return StreamingResponse(iter([b"a", b"b"]))
+
+        client = TestClient(app)
+        response = client.get("/items/1")
+        self.assertRegex(response.headers["server-timing"], r"^db;dur=[0-9.]+, total;dur=[0-9.]+$")
+        # стрімінг проходить крізь middleware без змін
+        self.assertEqual(client.get("/stream").content, b"ab")
+        client.get("/items/2")
+        self.assertEqual(registry.requests[("GET", "/items/{item_id}", "200")].count, 2)
+        self.assertEqual(registry.queries[("GET", "/items/{item_id}")], 2)
+
+        # вигадані методи не створюють нових серій метрик
+        for method in ("FOO", "BAR", "PURGE"):
+            client.request(method, "/items/1")
+        self.assertEqual({key[0] for key in registry.requests}, {"GET", "other"})
+        self.assertEqual(registry.requests[("other", "/items/{item_id}", "405")].count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
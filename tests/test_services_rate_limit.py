@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException, Request
+
+from src.services.auth import auth_service
+from src.services.rate_limit import Limiter, TokenBucket
+
+
+def read_contacts():
+    pass
+
+
+def make_request(token: str = None, host: str = "10.0.0.1") -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "path": "/api/contacts/", "headers": headers,
+                    "client": (host, 5000), "endpoint": read_contacts})
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(capacity=2, rate=0.4, now=0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertAlmostEqual(bucket.take(0), 2.5)
+        # через 2.5 с (rate 0.4/с) з'являється один токен
+        self.assertEqual(bucket.take(2.5), 0)
+        self.assertEqual(bucket.pending, 3)
+
+
+class TestLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.limiter = Limiter(sync_interval=1)
+        self.limit = self.limiter.limit("contacts", times=2, seconds=5)
+
+    async def test_rejects_without_redis(self):
+        await self.limit(make_request())
+        await self.limit(make_request())
+        with self.assertRaises(HTTPException) as err:
+            await self.limit(make_request())
+        self.assertEqual(err.exception.status_code, 429)
+        self.assertIn("Retry-After", err.exception.headers)
+        # інший IP має своє відро
+        await self.limit(make_request(host="10.0.0.2"))
+
+    async def test_keyed_by_user(self):
+        token = await auth_service.create_access_token(data={"sub": "user@example.com"})
+        self.assertEqual(self.limiter.identifier(make_request(token)), "user:user@example.com:read_contacts")
+        self.assertEqual(self.limiter.identifier(make_request("broken")), "ip:10.0.0.1:read_contacts")
+
+    async def test_sync_blocks_when_global_limit_used(self):
+        redis = MagicMock()
+        pipe = MagicMock()
+        # інші воркери вже витратили ліміт у цьому вікні
+        pipe.execute = AsyncMock(return_value=[3, True])
+        redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+        redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        self.limiter.redis = redis
+
+        await self.limit(make_request())
+        redis.pipeline.assert_not_called()
+        await self.limiter.sync()
+        key = pipe.incrby.call_args.args[0]
+        self.assertTrue(key.startswith("ratelimit:contacts:ip:10.0.0.1:read_contacts:"))
+        self.assertEqual(pipe.incrby.call_args.args[1], 1)
+
+        with self.assertRaises(HTTPException):
+            await self.limit(make_request())
+        bucket = self.limit.buckets["ip:10.0.0.1:read_contacts"]
+        self.assertEqual(bucket.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
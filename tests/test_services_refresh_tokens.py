@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from src.services.refresh_tokens import REUSED, ROTATED, UNKNOWN, RefreshTokenStore
+
+
+class TestRefreshTokenStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.eval = AsyncMock(return_value=ROTATED)
+        self.redis.expire = AsyncMock()
+        self.redis.delete = AsyncMock()
+        self.redis.smembers = AsyncMock(return_value={b"f1", b"f2"})
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock(return_value=[])
+        self.redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=self.pipe)
+        self.redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        self.store = RefreshTokenStore()
+        self.store.init(self.redis)
+
+    async def test_start_family(self):
+        family, jti = await self.store.start("user@example.com")
+        self.pipe.hset.assert_called_once_with(f"refresh:family:{family}",
+                                               mapping={"email": "user@example.com", "jti": jti})
+        # TTL сім'ї - 7 днів, як exp refresh-токена
+        self.pipe.expire.assert_any_call(f"refresh:family:{family}", 7 * 24 * 3600)
+        self.pipe.sadd.assert_called_once_with("refresh:user:user@example.com", family)
+
+    async def test_rotate(self):
+        next_jti = await self.store.rotate("user@example.com", "fam", "old")
+        args = self.redis.eval.await_args.args
+        self.assertEqual(args[1:], (2, "refresh:family:fam", "refresh:user:user@example.com",
+                                    "old", next_jti, self.store.ttl, "fam"))
+        self.assertNotEqual(next_jti, "old")
+        self.assertEqual(self.store.stats()["rotated"], 1)
+
+    async def test_reuse_and_unknown_rejected(self):
+        for result in (REUSED, UNKNOWN):
+            self.redis.eval.return_value = result
+            with self.assertRaises(HTTPException) as err:
+                await self.store.rotate("user@example.com", "fam", "old")
+            self.assertEqual(err.exception.status_code, 401)
+        self.assertEqual(self.store.stats()["reused"], 1)
+        # відкликана сім'я прибирається з множини користувача в тому самому скрипті
+        self.assertIn("redis.call('SREM', KEYS[2], ARGV[4])", self.redis.eval.await_args.args[0])
+
+    async def test_revoke_all(self):
+        self.assertEqual(await self.store.revoke_all("user@example.com"), 2)
+        args = self.redis.delete.await_args.args
+        self.assertEqual(args[0], "refresh:user:user@example.com")
+        self.assertEqual(set(args[1:]), {"refresh:family:f1", "refresh:family:f2"})
+
+    async def test_redis_down(self):
+        self.redis.eval.side_effect = ConnectionError("down")
+        with self.assertRaises(HTTPException) as err:
+            await self.store.rotate("user@example.com", "fam", "old")
+        self.assertEqual(err.exception.status_code, 503)
+
+        with self.assertRaises(HTTPException) as err:
+            await RefreshTokenStore().start("user@example.com")
+        self.assertEqual(err.exception.status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
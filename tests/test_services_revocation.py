@@ -0,0 +1,104 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from redis.exceptions import ConnectionError
+
+from src.services.revocation import BloomFilter, RevocationList
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+        self.assertTrue(all(f"revoked-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestRevocationList(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.zadd = AsyncMock()
+        self.redis.zscore = AsyncMock(return_value=None)
+        self.redis.zremrangebyscore = AsyncMock()
+        self.redis.zrangebyscore = AsyncMock(return_value=[])
+        self.revoked = RevocationList(capacity=1000, error_rate=0.001, sync_interval=60)
+
+    async def test_without_redis(self):
+        self.assertFalse(self.revoked.maybe_revoked("a"))
+        await self.revoked.revoke("a", time.time() + 60)
+        self.assertTrue(self.revoked.maybe_revoked("a"))
+        self.assertTrue(await self.revoked.confirm("a"))
+
+    async def test_filter_hit_confirmed_in_redis(self):
+        self.revoked.redis = self.redis
+        exp = time.time() + 60
+        await self.revoked.revoke("a", exp)
+        self.redis.zadd.assert_awaited_once_with("revoked", {"a": exp})
+        self.assertTrue(self.revoked.maybe_revoked("a"))
+
+        self.redis.zscore.return_value = exp
+        self.assertTrue(await self.revoked.confirm("a"))
+        # збіг фільтра, якого немає в Redis, - хибний, токен дійсний
+        self.redis.zscore.return_value = None
+        self.assertFalse(await self.revoked.confirm("b"))
+        self.assertEqual(self.revoked.stats()["false_positives"], 1)
+
+    async def test_redis_error_fails_closed(self):
+        self.revoked.redis = self.redis
+        self.redis.zscore.side_effect = ConnectionError("down")
+        self.assertTrue(await self.revoked.confirm("a"))
+
+    async def test_sync_rebuilds_from_redis(self):
+        self.revoked.redis = self.redis
+        self.revoked.add_local("expired")
+        self.redis.zrangebyscore.return_value = ["a", "b"]
+        await self.revoked.sync()
+        self.redis.zremrangebyscore.assert_awaited_once()
+        self.assertTrue(self.revoked.maybe_revoked("a"))
+        self.assertTrue(self.revoked.maybe_revoked("b"))
+        self.assertFalse(self.revoked.maybe_revoked("expired"))
+
+    async def test_start_loads_list_before_serving(self):
+        self.redis.zrangebyscore.return_value = ["a"]
+        await self.revoked.start(self.redis)
+        try:
+            self.assertTrue(self.revoked.maybe_revoked("a"))
+            self.redis.zrangebyscore.assert_awaited_once()
+        finally:
+            await self.revoked.stop()
+
+    async def test_reconnect_syncs_are_merged(self):
+        await self.revoked.start(self.redis)
+        calls = []
+
+        async def zrangebyscore(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                # перепідключення, поки перебудова йде: ще одна перебудова після неї, а не три
+                for _ in range(3):
+                    self.revoked.add_local(None)
+            return []
+
+        self.redis.zrangebyscore.side_effect = zrangebyscore
+        try:
+            self.revoked.add_local(None)
+            resync = self.revoked._resync
+            await resync
+            self.assertEqual(len(calls), 2)
+            self.assertIs(self.revoked._resync, resync)
+        finally:
+            await self.revoked.stop()
+        self.assertIsNone(self.revoked._resync)
+
+
+if __name__ == '__main__':
+    unittest.main()